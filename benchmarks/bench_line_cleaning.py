@@ -0,0 +1,75 @@
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src", "extraction"))
+import extract_placename_records as epr
+
+
+def legacy_clean_line_start(line):
+    """逐轮尝试全部朝代/政区/动词前缀的旧实现，仅作基准对照。"""
+    line = re.sub(r"^\d+\s*", "", line).strip()
+    changed = True
+    while changed:
+        original = line
+        for d in epr.DYNASTIES:
+            if line.startswith(d):
+                line = line[len(d):].lstrip(" ；，。")
+        for a in epr.ADMIN_LEVELS:
+            match = re.match(rf"^[一-龥]{{1,2}}{a}", line)
+            if match:
+                line = line[len(match.group(0)):].lstrip(" ；，。")
+        for v in epr.PREFIX_VERBS:
+            if line.startswith(v):
+                line = line[len(v):].lstrip(" ；，。")
+        changed = (original != line)
+    return line
+
+
+def legacy_extract_valid_placename(line):
+    cleaned_start = legacy_clean_line_start(line)
+    if not cleaned_start: return None
+    for suffix in epr.PLACE_SUFFIXES:
+        if suffix in cleaned_start:
+            idx = cleaned_start.find(suffix)
+            potential_name = cleaned_start[:idx+1]
+            if not (2 <= len(potential_name) <= 3):
+                continue
+            if any(potential_name.startswith(w) for w in epr.STOP_START_WORDS):
+                continue
+            after_name = cleaned_start[idx+1:]
+            if after_name and not re.match(r"^[，。；\s]", after_name):
+                if any(after_name.startswith(dir_word) for dir_word in ["南", "北", "西", "东", "治", "界"]):
+                    continue
+            return potential_name
+    return None
+
+
+def time_lines(func, lines, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for line in lines:
+            func(line)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best if best else float("inf")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="地名行前缀剥离/后缀扫描微基准：新旧实现每秒处理行数对比")
+    parser.add_argument("volume", help="transport_to_txt 输出的 .txt 卷")
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    with open(args.volume, "r", encoding="utf-8") as f:
+        lines = [l.strip() for l in f if l.strip()]
+
+    mismatches = sum(epr.extract_valid_placename(l) != legacy_extract_valid_placename(l) for l in lines)
+    before = time_lines(legacy_extract_valid_placename, lines, args.repeat)
+    after = time_lines(epr.extract_valid_placename, lines, args.repeat)
+
+    print(f"{os.path.basename(args.volume)}: {len(lines)} 行，结果不一致 {mismatches} 行")
+    print(f"旧实现: {before:,.0f} 行/秒")
+    print(f"新实现: {after:,.0f} 行/秒  ({after / before:.2f}x)")
@@ -0,0 +1,91 @@
+import json
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for rel in ["src", "src/extraction"]:
+    sys.path.insert(0, os.path.join(ROOT, rel))
+from checkpoint_journal import CheckpointJournal
+from common.record_ids import RECORD_COLUMNS, RECORD_ID, record_key
+from common.table_io import read_table
+
+COLUMNS = RECORD_COLUMNS + ["resolution_type"]
+
+
+def row(rid, label):
+    return {RECORD_ID: rid, "placename": "甲", "text": "甲縣", "source": "s", "resolution_type": label}
+
+
+def compacted(workdir, journal):
+    path = os.path.join(workdir, "results.csv")
+    journal.compact(path, COLUMNS)
+    return read_table(path).fillna("")
+
+
+def check_duplicates(workdir):
+    """同一 record_id 写入多次（跨两次运行，含末字节为 0 的摘要）时只保留最先写入的一条。"""
+    path = os.path.join(workdir, "dup.jsonl")
+    nul, plain = "ab" * 15 + "00", "cd" * 16
+    journal = CheckpointJournal(path, record_key).load()
+    for rid, label in [(nul, "A"), (plain, "B"), (nul, "C")]:
+        journal.append(row(rid, label))
+    journal.close()
+    journal = CheckpointJournal(path, record_key).load()
+    journal.append(row(plain, "D"))
+    df = compacted(workdir, journal)
+    return sorted(zip(df[RECORD_ID], df["resolution_type"])) == sorted([(nul, "A"), (plain, "B")])
+
+
+def write_lines(path, lines):
+    with open(path, "wb") as f:
+        f.write(b"".join(lines))
+
+
+def journal_line(rid, label):
+    return (json.dumps(row(rid, label), ensure_ascii=False) + "\n").encode("utf-8")
+
+
+def check_partial_tail(workdir):
+    """崩溃时写了一半的末行被截掉，之前的记录全部保留，续写从完整行之后开始。"""
+    path = os.path.join(workdir, "tail.jsonl")
+    ids = [f"{i:032x}" for i in range(1, 4)]
+    write_lines(path, [journal_line(ids[0], "A"), journal_line(ids[1], "B"), journal_line(ids[2], "C")[:20]])
+    journal = CheckpointJournal(path, record_key).load()
+    ok = len(journal) == 2 and ids[1] in journal and ids[2] not in journal
+    journal.append(row(ids[2], "C"))
+    df = compacted(workdir, journal)
+    return ok and list(df["resolution_type"]) == ["A", "B", "C"]
+
+
+def check_corrupt_middle(workdir):
+    """中间的损坏行只跳过该行，其后的有效记录照常载入并写入结果表。"""
+    path = os.path.join(workdir, "middle.jsonl")
+    ids = [f"{i:032x}" for i in range(1, 5)]
+    broken = journal_line(ids[1], "B")[:30] + b"\n"
+    write_lines(path, [journal_line(ids[0], "A"), broken, b"not json\n", journal_line(ids[2], "C"),
+                       journal_line(ids[3], "D")])
+    size = os.path.getsize(path)
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        stdout, sys.stdout = sys.stdout, devnull
+        try:
+            journal = CheckpointJournal(path, record_key).load()
+        finally:
+            sys.stdout = stdout
+    ok = journal.corrupt == 2 and len(journal) == 3 and os.path.getsize(path) == size
+    ok = ok and list(journal.contains_many(ids)) == [True, False, True, True]
+    df = compacted(workdir, journal)
+    return ok and list(df["resolution_type"]) == ["A", "C", "D"]
+
+
+CHECKS = [check_duplicates, check_partial_tail, check_corrupt_middle]
+
+
+if __name__ == "__main__":
+    failures = 0
+    for check in CHECKS:
+        with tempfile.TemporaryDirectory() as workdir:
+            ok = check(workdir)
+        print(f"{'通过' if ok else '失败'}  {check.__name__}：{check.__doc__}")
+        failures += not ok
+    sys.exit(1 if failures else 0)
@@ -0,0 +1,59 @@
+import argparse
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for rel in ["src", "src/extraction", "src/resolution", "src/rag", "utils"]:
+    sys.path.insert(0, os.path.join(ROOT, rel))
+from embedding_backends import get_embeddings
+from indexer import sync_index
+from lexical_index import HybridRetriever, load_or_build
+from run_benchmarks import build_inputs
+from synthetic_corpus import generate_corpus
+
+
+def snapshot(docs):
+    return [(d.id, d.page_content, d.metadata.get("record_id")) for d in docs]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="多线程并发检索，核对从磁盘加载的索引返回的文档与单线程一致")
+    parser.add_argument("--volumes", type=int, default=2)
+    parser.add_argument("--entries", type=int, default=200, help="每卷词条数")
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--rounds", type=int, default=20, help="每个问句重复查询的次数")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            _, _, _, classified = build_inputs(generate_corpus(args.volumes, args.entries, args.seed), workdir)
+            classified.to_csv("batch_classification_results.csv", index=False)
+            embeddings, model = get_embeddings("hashed")
+            # 先建索引落盘，再重新加载，使文档走按偏移读取的路径
+            load_or_build(rebuild=True)
+            sync_index(embeddings, model, store="mmap")
+            lexical = load_or_build()
+            vectorstore = sync_index(embeddings, model, store="mmap")
+            retriever = HybridRetriever(lexical=lexical, vectorstore=vectorstore, k=5)
+
+            indexed = classified[classified["resolution_type"].isin(["STRONG", "WEAK"])]
+            queries = [f"{p}为何得名" for p in indexed["placename"].head(40)]
+            queries += [t[:12] for t in indexed["text"].head(40)]
+            expected = {q: snapshot(retriever.invoke(q)) for q in queries}
+            positions = list(range(len(lexical.ids))) * 4
+            expected_docs = {i: snapshot([lexical.document(i)]) for i in range(len(lexical.ids))}
+
+            with ThreadPoolExecutor(args.threads) as pool:
+                results = list(pool.map(lambda q: (q, snapshot(retriever.invoke(q))), queries * args.rounds))
+                docs = list(pool.map(lambda i: (i, snapshot([lexical.document(i)])), positions))
+        finally:
+            os.chdir(cwd)
+
+    wrong = sum(got != expected[q] for q, got in results) + sum(got != expected_docs[i] for i, got in docs)
+    print(f"{args.threads} 线程：检索 {len(results)} 次，读取文档 {len(docs)} 次，结果不一致 {wrong} 次。")
+    sys.exit(1 if wrong else 0)
@@ -0,0 +1,73 @@
+import argparse
+import os
+import sys
+import tempfile
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for rel in ["src", "src/extraction", "src/resolution", "utils"]:
+    sys.path.insert(0, os.path.join(ROOT, rel))
+import extract_explanatory_sentences as clf
+from common.record_ids import RECORD_ID
+from common.table_io import read_table
+from llm_stub_server import StubConfig, label_for, start_server
+from resolve_naming_target import resolve_frame
+from run_benchmarks import build_inputs
+from synthetic_corpus import generate_corpus
+
+
+def resume_from_legacy(resolved, legacy, url, chunksize):
+    """在临时目录中放入旧版进度表（没有 record_id）后续跑分类阶段，返回压实后的结果表。"""
+    cwd = os.getcwd()
+    clf.API_URL = url
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            resolved.to_csv(clf.INPUT_CSV, index=False)
+            legacy.to_csv(clf.PROGRESS_FILE, index=False)
+            with open(os.devnull, "w", encoding="utf-8") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    clf.main(4, use_cache=False, chunksize=chunksize)
+                finally:
+                    sys.stdout = stdout
+            return read_table(clf.PROGRESS_FILE).fillna("")
+        finally:
+            os.chdir(cwd)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="从旧版进度表（没有 record_id）续跑分类阶段，核对已完成记录不重复处理")
+    parser.add_argument("--volumes", type=int, default=1)
+    parser.add_argument("--entries", type=int, default=150, help="每卷词条数")
+    parser.add_argument("--seed", type=int, default=11)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as workdir:
+        _, _, records, _ = build_inputs(generate_corpus(args.volumes, args.entries, args.seed), workdir)
+    resolved = resolve_frame(records)
+    renamed = int((resolved["placename"] != records.loc[resolved.index, "placename"]).sum())
+
+    # 旧版进度：前一半记录的解析后内容与分类结果，没有 record_id 列
+    done = resolved.iloc[:len(resolved) // 2]
+    labels = [label_for(p, t) for p, t in zip(done["placename"], done["text"])]
+    legacy = done.drop(columns=[RECORD_ID]).assign(resolution_type=[l for l, _ in labels],
+                                                   evidence=[e for _, e in labels], label_source="legacy")
+
+    server = start_server(StubConfig(latency="fixed", latency_mean=0.0), port=0)
+    url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+    failures = 0
+    try:
+        for chunksize in [None, 17]:
+            results = resume_from_legacy(resolved, legacy, url, chunksize)
+            problems = []
+            if sorted(results[RECORD_ID]) != sorted(resolved[RECORD_ID]):
+                problems.append("record_id 与输入表不一致")
+            if (results["label_source"] == "legacy").sum() != len(legacy):
+                problems.append("旧版记录未全部沿用")
+            mode = f"分块 {chunksize}" if chunksize else "整表"
+            print(f"{mode}：输入 {len(resolved)} 条（地名经解析改写 {renamed} 条），旧版进度 {len(legacy)} 条，"
+                  f"结果 {len(results)} 条。{'；'.join(problems) or '通过'}")
+            failures += bool(problems)
+    finally:
+        server.shutdown()
+    sys.exit(1 if failures or not renamed else 0)
@@ -0,0 +1,172 @@
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8900
+BATCH_ITEM = re.compile(r"^【(\d+)】地名：【(.*?)】\n文本：(.*?)(?=\n\n【\d+】|\Z)", re.MULTILINE | re.DOTALL)
+SINGLE_ITEM = re.compile(r"^地名：【(.*?)】\n文本：(.*)", re.DOTALL)
+
+
+class StubConfig:
+    """
+    延迟分布（fixed/uniform/lognormal，单位秒）与故障注入比例。
+    同一 seed 下故障注入序列可复现；标签只取决于记录内容。
+    """
+
+    def __init__(self, latency="lognormal", latency_mean=0.3, latency_spread=0.5, p429=0.0, p500=0.0,
+                 p_malformed=0.0, p_drop_item=0.0, retry_after=0.2, seed=0):
+        self.latency = latency
+        self.latency_mean = latency_mean
+        self.latency_spread = latency_spread
+        self.p429 = p429
+        self.p500 = p500
+        self.p_malformed = p_malformed
+        self.p_drop_item = p_drop_item
+        self.retry_after = retry_after
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.stats = {"requests": 0, "ok": 0, "429": 0, "500": 0, "malformed": 0, "dropped_items": 0, "items": 0}
+
+    def roll(self):
+        with self.lock:
+            return self.rng.random()
+
+    def delay(self):
+        with self.lock:
+            if self.latency == "fixed":
+                return self.latency_mean
+            if self.latency == "uniform":
+                return self.rng.uniform(self.latency_mean * (1 - self.latency_spread),
+                                        self.latency_mean * (1 + self.latency_spread))
+            # 对数正态：中位数为 latency_mean，spread 为对数标准差，长尾接近真实接口
+            return self.latency_mean * self.rng.lognormvariate(0, self.latency_spread)
+
+    def count(self, key, n=1):
+        with self.lock:
+            self.stats[key] += n
+
+
+def label_for(placename, text):
+    """按内容哈希确定标签，约 20% STRONG、25% WEAK、55% NONE，同一记录每次结果相同。"""
+    bucket = zlib.crc32(f"{placename}\0{text}".encode("utf-8")) % 100
+    label = "STRONG" if bucket < 20 else "WEAK" if bucket < 45 else "NONE"
+    return label, text[:12]
+
+
+def make_handler(config):
+    class StubHandler(BaseHTTPRequestHandler):
+        def _send(self, status, payload=None, raw=None, headers=()):
+            body = raw if raw is not None else json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            for k, v in headers:
+                self.send_header(k, v)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == "/stats":
+                with config.lock:
+                    self._send(200, dict(config.stats))
+            else:
+                self._send(404, {"error": "not found"})
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length", 0))
+            try:
+                body = json.loads(self.rfile.read(length))
+                system, user = body["messages"][0]["content"], body["messages"][1]["content"]
+            except (ValueError, KeyError, IndexError, TypeError):
+                self._send(400, {"error": "bad request"})
+                return
+            config.count("requests")
+            time.sleep(config.delay())
+
+            roll = config.roll()
+            if roll < config.p429:
+                config.count("429")
+                self._send(429, {"error": "rate limited"}, headers=[("Retry-After", str(config.retry_after))])
+                return
+            if roll < config.p429 + config.p500:
+                config.count("500")
+                self._send(500, {"error": "internal error"})
+                return
+
+            batch = BATCH_ITEM.findall(user)
+            if batch:
+                items = []
+                for rid, placename, text in batch:
+                    if config.roll() < config.p_drop_item:
+                        config.count("dropped_items")
+                        continue
+                    label, evidence = label_for(placename, text.strip())
+                    items.append({"id": int(rid), "label": label, "evidence": evidence})
+                config.count("items", len(batch))
+                content = json.dumps(items, ensure_ascii=False)
+            else:
+                m = SINGLE_ITEM.match(user)
+                label, evidence = label_for(m.group(1), m.group(2).strip()) if m else ("NONE", "")
+                config.count("items")
+                content = json.dumps({"label": label, "evidence": evidence}, ensure_ascii=False)
+
+            if config.roll() < config.p_malformed:
+                config.count("malformed")
+                content = content[:max(1, len(content) // 2)]
+            config.count("ok")
+            self._send(200, {
+                "choices": [{"message": {"role": "assistant", "content": content}}],
+                "usage": {"prompt_tokens": len(system) + len(user), "completion_tokens": len(content)},
+            })
+
+        def log_message(self, fmt, *args):
+            pass
+
+    return StubHandler
+
+
+def start_server(config, host=DEFAULT_HOST, port=DEFAULT_PORT):
+    """在后台线程中启动，返回 server；port=0 时由系统分配端口（server.server_address[1]）。"""
+    server = ThreadingHTTPServer((host, port), make_handler(config))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def add_stub_arguments(parser):
+    parser.add_argument("--latency", default="lognormal", choices=["fixed", "uniform", "lognormal"])
+    parser.add_argument("--latency-mean", type=float, default=0.3, help="延迟中位数（秒）")
+    parser.add_argument("--latency-spread", type=float, default=0.5, help="uniform 为相对幅度，lognormal 为对数标准差")
+    parser.add_argument("--p429", type=float, default=0.0, help="返回 429 的比例")
+    parser.add_argument("--p500", type=float, default=0.0, help="返回 500 的比例")
+    parser.add_argument("--p-malformed", type=float, default=0.0, help="返回截断 JSON 的比例")
+    parser.add_argument("--p-drop-item", type=float, default=0.0, help="批量请求中遗漏单条结果的比例")
+    parser.add_argument("--retry-after", type=float, default=0.2, help="429 响应的 Retry-After（秒）")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def config_from_args(args):
+    return StubConfig(args.latency, args.latency_mean, args.latency_spread, args.p429, args.p500,
+                      args.p_malformed, args.p_drop_item, args.retry_after, args.seed)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="本地 OpenAI 兼容 chat-completions 桩服务，用于离线测试分类阶段")
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    server = start_server(config_from_args(args), args.host, args.port)
+    print(f"桩服务已启动：http://{args.host}:{args.port}/v1/chat/completions（GET /stats 查看注入统计，Ctrl+C 退出）")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,120 @@
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for rel in ["src", "src/extraction"]:
+    sys.path.insert(0, os.path.join(ROOT, rel))
+import extract_explanatory_sentences as clf
+from common.table_io import read_table
+from llm_stub_server import add_stub_arguments, config_from_args, start_server
+from run_benchmarks import build_inputs
+from synthetic_corpus import generate_corpus
+
+
+def percentiles(values):
+    if not values:
+        return {}
+    ordered = sorted(values)
+    pick = lambda q: round(ordered[min(len(ordered) - 1, int(q * len(ordered)))], 4)
+    return {"p50": pick(0.5), "p90": pick(0.9), "p99": pick(0.99), "max": round(ordered[-1], 4)}
+
+
+def make_records(volumes, entries, seed):
+    with tempfile.TemporaryDirectory() as workdir:
+        _, _, records, _ = build_inputs(generate_corpus(volumes, entries, seed), workdir)
+    return records
+
+
+def run_once(records, url, concurrency, batch_size, rpm, tpm, max_retries):
+    """在临时目录中对桩服务完整跑一次分类阶段，返回吞吐、调用延迟分位数与结果分布。"""
+    latencies = []
+    original = clf.post_chat
+
+    def timed_post_chat(*args, **kwargs):
+        # 单次调用含限流等待、重试与退避，即记录实际等待结果的时长
+        start = time.perf_counter()
+        try:
+            return original(*args, **kwargs)
+        finally:
+            latencies.append(time.perf_counter() - start)
+
+    cwd = os.getcwd()
+    clf.API_URL, clf.MAX_RETRIES, clf.post_chat = url, max_retries, timed_post_chat
+    with tempfile.TemporaryDirectory() as workdir:
+        try:
+            os.chdir(workdir)
+            records.to_csv(clf.INPUT_CSV, index=False)
+            start = time.perf_counter()
+            clf.main(concurrency, rpm, tpm, use_cache=False, batch_size=batch_size)
+            elapsed = time.perf_counter() - start
+            results = read_table(clf.PROGRESS_FILE)
+        finally:
+            clf.post_chat = original
+            os.chdir(cwd)
+
+    labels = results["resolution_type"].value_counts().to_dict()
+    return {
+        "concurrency": concurrency,
+        "batch_size": batch_size,
+        "records": len(results),
+        "seconds": round(elapsed, 3),
+        "records_per_s": round(len(results) / elapsed, 2) if elapsed else None,
+        "llm_calls": len(latencies),
+        "call_latency_s": percentiles(latencies),
+        "labels": labels,
+        "errors": int(labels.get("ERROR", 0)),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="对本地桩服务跑完整分类阶段，比较不同并发/批量配置的吞吐与尾延迟")
+    parser.add_argument("--url", default=None, help="外部桩服务地址；缺省在进程内启动一个")
+    parser.add_argument("--volumes", type=int, default=2)
+    parser.add_argument("--entries", type=int, default=100, help="每卷词条数")
+    parser.add_argument("--concurrency", default="1,4,8,16", help="逗号分隔的并发数")
+    parser.add_argument("--batch-size", default="1", help="逗号分隔的批量大小")
+    parser.add_argument("--rpm", type=int, default=0)
+    parser.add_argument("--tpm", type=int, default=0)
+    parser.add_argument("--max-retries", type=int, default=clf.MAX_RETRIES)
+    parser.add_argument("--output", default=None, help="结果 JSON 路径")
+    add_stub_arguments(parser)
+    args = parser.parse_args()
+
+    url = args.url
+    config = None
+    if not url:
+        config = config_from_args(args)
+        server = start_server(config, port=0)
+        url = f"http://127.0.0.1:{server.server_address[1]}/v1/chat/completions"
+
+    records = make_records(args.volumes, args.entries, args.seed)
+    print(f"合成记录 {len(records)} 条，桩服务 {url}")
+
+    runs = []
+    for batch_size in [int(b) for b in args.batch_size.split(",")]:
+        for concurrency in [int(c) for c in args.concurrency.split(",")]:
+            # 分类阶段逐条打印进度，这里只保留汇总
+            with open(os.devnull, "w", encoding="utf-8") as devnull:
+                stdout, sys.stdout = sys.stdout, devnull
+                try:
+                    result = run_once(records, url, concurrency, batch_size, args.rpm, args.tpm, args.max_retries)
+                finally:
+                    sys.stdout = stdout
+            runs.append(result)
+            lat = result["call_latency_s"]
+            print(f"并发 {concurrency:>3} 批量 {batch_size:>2}: {result['records_per_s']:>8} 条/秒  "
+                  f"调用 {result['llm_calls']:>5} 次  p50={lat.get('p50')} p90={lat.get('p90')} "
+                  f"p99={lat.get('p99')} max={lat.get('max')}  ERROR {result['errors']}")
+
+    report = {"settings": vars(args), "runs": runs}
+    if config is not None:
+        report["stub_stats"] = dict(config.stats)
+        print(f"桩服务统计：{report['stub_stats']}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, ensure_ascii=False, indent=1)
+        print(f"结果已写入 {args.output}")
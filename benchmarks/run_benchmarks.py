@@ -0,0 +1,151 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+import pandas as pd
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+for rel in ["src", "src/extraction", "src/resolution", "utils"]:
+    sys.path.insert(0, os.path.join(ROOT, rel))
+import extract_placename_records as epr
+from common.analytics import compute_stats
+from common.record_ids import ensure_ids
+from extract_explanatory_sentences import check_strong_by_regex
+from resolve_naming_target import resolve_frame, resolve_target
+from synthetic_corpus import generate_corpus, to_html, write_corpus
+from transport_to_txt import extract_ctext_text
+
+RESULTS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results")
+BASE_VOLUMES = 4
+ENTRIES_PER_VOLUME = 250
+REGRESSION_THRESHOLD = 0.15
+
+
+def best_of(func, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def git_revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def build_inputs(corpus, workdir):
+    """由合成语料准备各阶段输入：HTML 页面、文本行、抽取得到的记录与模拟分类结果。"""
+    write_corpus(workdir, corpus, html=False)
+    pages = [to_html(lines, name) for name, lines in corpus]
+    lines = [line for _, volume in corpus for line in volume]
+    items = []
+    for name, _ in corpus:
+        items.extend(epr.extract_file(workdir, f"{name}.txt"))
+    records = ensure_ids(pd.DataFrame({
+        "placename": [k[0] for k, _ in items],
+        "text": ["".join(v) for _, v in items],
+        "source": [k[1] for k, _ in items],
+    }))
+    labels = ["WEAK", "NONE", "NONE"]
+    classified = records.assign(resolution_type=[
+        "STRONG" if check_strong_by_regex(t) else labels[i % 3] for i, t in enumerate(records["text"])])
+    classified["text_len"] = classified["text"].str.len()
+    return pages, lines, records, classified
+
+
+def run_scale(scale, repeat, seed):
+    corpus = generate_corpus(BASE_VOLUMES * scale, ENTRIES_PER_VOLUME, seed)
+    with tempfile.TemporaryDirectory() as workdir:
+        pages, lines, records, classified = build_inputs(corpus, workdir)
+        names = [f"{name}.txt" for name, _ in corpus]
+        rows = records.to_dict("records")
+        texts = records["text"].tolist()
+        page_bytes = sum(len(p.encode("utf-8")) for p in pages)
+        text_bytes = sum(len(t.encode("utf-8")) for t in texts)
+
+        cases = [
+            ("extract_ctext_text", len(pages), page_bytes, lambda: [extract_ctext_text(p) for p in pages]),
+            ("extract_valid_placename", len(lines), None, lambda: [epr.extract_valid_placename(l) for l in lines]),
+            ("extract_file", len(names), None, lambda: [epr.extract_file(workdir, n) for n in names]),
+            ("resolve_target", len(rows), text_bytes, lambda: [resolve_target(r) for r in rows]),
+            ("resolve_frame", len(records), text_bytes, lambda: resolve_frame(records)),
+            ("check_strong_by_regex", len(texts), text_bytes, lambda: [check_strong_by_regex(t) for t in texts]),
+            ("compute_stats", len(classified), text_bytes, lambda: compute_stats(classified)),
+        ]
+        results = []
+        for name, items, nbytes, func in cases:
+            seconds = best_of(func, repeat)
+            result = {"benchmark": name, "scale": scale, "items": items, "seconds": round(seconds, 6),
+                      "items_per_s": round(items / seconds, 1) if seconds else None}
+            if nbytes is not None:
+                result["mb_per_s"] = round(nbytes / seconds / 1e6, 3) if seconds else None
+            results.append(result)
+            print(f"  {name:<26} {items:>9,} 项  {seconds:9.4f} 秒  {result['items_per_s']:>14,.0f} 项/秒")
+    return results
+
+
+def compare(current, baseline_path, threshold=REGRESSION_THRESHOLD):
+    """与基线结果按 (基准, 规模) 对比吞吐，下降超过阈值的记为回退，返回回退条数。"""
+    with open(baseline_path, "r", encoding="utf-8") as f:
+        baseline = {(r["benchmark"], r["scale"]): r for r in json.load(f)["results"]}
+    regressions = 0
+    print(f"\n对比基线 {baseline_path}：")
+    for r in current["results"]:
+        old = baseline.get((r["benchmark"], r["scale"]))
+        if not old or not old.get("items_per_s") or not r.get("items_per_s"):
+            continue
+        ratio = r["items_per_s"] / old["items_per_s"]
+        flag = ""
+        if ratio < 1 - threshold:
+            flag = "  <-- 回退"
+            regressions += 1
+        print(f"  {r['benchmark']:<26} {r['scale']:>4}x  {ratio:6.2f}x{flag}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="各阶段热点函数在 1x/10x/100x 合成语料上的吞吐基准")
+    parser.add_argument("--scales", default="1,10,100", help="语料规模倍数，逗号分隔")
+    parser.add_argument("--repeat", type=int, default=3, help="每项取最快的一次")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="结果 JSON 路径，缺省写入 benchmarks/results/<版本>.json")
+    parser.add_argument("--compare", default=None, help="与之对比的基线结果 JSON")
+    parser.add_argument("--threshold", type=float, default=REGRESSION_THRESHOLD, help="吞吐下降超过该比例视为回退")
+    args = parser.parse_args()
+
+    revision = git_revision()
+    report = {
+        "meta": {
+            "revision": revision,
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "base_volumes": BASE_VOLUMES,
+            "entries_per_volume": ENTRIES_PER_VOLUME,
+            "repeat": args.repeat,
+        },
+        "results": [],
+    }
+    for scale in [int(s) for s in args.scales.split(",") if s.strip()]:
+        print(f"[{scale}x] {BASE_VOLUMES * scale} 卷 × {ENTRIES_PER_VOLUME} 词条")
+        report["results"].extend(run_scale(scale, args.repeat, args.seed))
+
+    output = args.output or os.path.join(RESULTS_DIR, f"{revision or 'local'}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, "w", encoding="utf-8") as f:
+        json.dump(report, f, ensure_ascii=False, indent=1)
+    print(f"\n结果已写入 {output}")
+
+    if args.compare and compare(report, args.compare, args.threshold):
+        sys.exit(1)
@@ -0,0 +1,102 @@
+import argparse
+import os
+import random
+import sys
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+sys.path.insert(0, os.path.join(ROOT, "src", "extraction"))
+from extract_placename_records import ADMIN_LEVELS, DYNASTIES, PLACE_SUFFIXES, PREFIX_VERBS
+from extract_explanatory_sentences import STRONG_PATTERNS
+
+# 常用字表，仅用于拼出形似方志的随机文字
+NAME_CHARS = "安平陽武昌興寧德化長清永豐新高河東西南北白石龍鳳雲青黃金華泉松柏桃梅桐竹"
+FILLER_CHARS = "之其在有為而以於故云曰里東西南北上下中古今山水城門舊新大小一二三四五六七八九十百"
+DIRECTIONS = ["東", "西", "南", "北", "東南", "西北"]
+BOOKS = ["《水經注》", "《漢書》", "《元和郡縣志》", "《太平寰宇記》", "《輿地紀勝》"]
+
+# STRONG_PATTERNS 中的 ".*?" 替换为随机短语，得到真实措辞
+STRONG_TEMPLATES = [p.replace(".*?", "{}") for p in STRONG_PATTERNS]
+
+
+def random_text(rng, low, high, chars=FILLER_CHARS):
+    return "".join(rng.choice(chars) for _ in range(rng.randint(low, high)))
+
+
+def random_placename(rng):
+    return random_text(rng, 1, 2, NAME_CHARS) + rng.choice(PLACE_SUFFIXES)
+
+
+def explanation(rng):
+    """按大致比例生成强解释 / 弱引证 / 纯地理描述三类句子。"""
+    roll = rng.random()
+    if roll < 0.25:
+        phrase = rng.choice(STRONG_TEMPLATES).format(random_text(rng, 1, 6))
+        return random_text(rng, 2, 10) + phrase
+    if roll < 0.45:
+        return f"{rng.choice(BOOKS)}云：{random_text(rng, 6, 20)}"
+    return f"在州{rng.choice(DIRECTIONS)}{rng.randint(2, 300)}里，{random_text(rng, 4, 24)}"
+
+
+def entry_lines(rng):
+    """一个词条：带朝代/政区/动词前缀的首行，加若干续行。"""
+    head = ""
+    if rng.random() < 0.3:
+        head += f"{rng.randint(1, 999)} "
+    if rng.random() < 0.3:
+        head += rng.choice(DYNASTIES)
+    if rng.random() < 0.2:
+        head += random_text(rng, 1, 2, NAME_CHARS) + rng.choice(ADMIN_LEVELS)
+    if rng.random() < 0.3:
+        head += rng.choice(PREFIX_VERBS)
+    lines = [f"{head}{random_placename(rng)}，{explanation(rng)}。"]
+    for _ in range(rng.randint(0, 3)):
+        lines.append(explanation(rng) + "。")
+    return lines
+
+
+def generate_volume(rng, entries):
+    lines = []
+    for _ in range(entries):
+        lines.extend(entry_lines(rng))
+    return lines
+
+
+def to_html(lines, title):
+    """仿 ctext.org 页面：正文在 td.ctext 中，前后夹带导航与脚本等无关标签。"""
+    rows = "\n".join(f'<tr><td class="ctext">{line}</td></tr>' for line in lines)
+    return (f"<html><head><title>{title}</title><script>var x = 1;</script></head><body>"
+            f'<div id="menu"><a href="/">首頁</a> <a href="/wiki">維基</a></div>'
+            f"<table>\n{rows}\n</table>"
+            f'<div class="footer">{"<span>" * 3}footer{"</span>" * 3}</div></body></html>')
+
+
+def generate_corpus(volumes, entries_per_volume, seed=0):
+    """返回 [(卷名, 文本行列表)]；相同参数与种子得到完全相同的语料。"""
+    rng = random.Random(seed)
+    return [(f"vol{i:04d}", generate_volume(rng, entries_per_volume)) for i in range(volumes)]
+
+
+def write_corpus(output_dir, corpus, html=True, txt=True):
+    os.makedirs(output_dir, exist_ok=True)
+    for name, lines in corpus:
+        if txt:
+            with open(os.path.join(output_dir, f"{name}.txt"), "w", encoding="utf-8") as f:
+                f.write("\n".join(lines))
+        if html:
+            with open(os.path.join(output_dir, f"{name}.html"), "w", encoding="utf-8") as f:
+                f.write(to_html(lines, name))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="生成仿方志的合成 .html/.txt 语料，用于基准测试")
+    parser.add_argument("output_dir")
+    parser.add_argument("--volumes", type=int, default=10)
+    parser.add_argument("--entries", type=int, default=200, help="每卷词条数")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-html", action="store_true")
+    parser.add_argument("--no-txt", action="store_true")
+    args = parser.parse_args()
+
+    corpus = generate_corpus(args.volumes, args.entries, args.seed)
+    write_corpus(args.output_dir, corpus, html=not args.no_html, txt=not args.no_txt)
+    print(f"已生成 {args.volumes} 卷、共 {sum(len(lines) for _, lines in corpus)} 行至 {args.output_dir}")
@@ -0,0 +1,185 @@
+import argparse
+import os
+import sys
+import time
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS, stage
+from common.record_ids import RECORD_ID, ensure_ids
+from common.table_io import read_table, table_exists
+
+INPUT_FILE = "batch_classification_results.csv"
+STATS_FILE = "analysis_stats.csv"
+RECORD_SUBTYPES_FILE = "analysis_record_subtypes.csv"
+
+# 维度 -> (适用类别, [(子类, 规则)], 兜底子类)；规则按顺序取首个命中
+SUBTYPE_RULES = {
+    "strong_subtype": ("STRONG", [
+        ("Mountain", r"山|岭|峰|岩"),
+        ("Hydrology", r"水|河|江|川|溪|池"),
+        ("Person/Clan", r"人|王|公|姓|氏"),
+        ("Admin/History", r"故|旧|改|徙"),
+    ], "Other"),
+    "strong_logic": ("STRONG", [
+        ("自然山岳", r"山|岭|峰|岩|岳|冈"),
+        ("自然水文", r"水|河|江|川|溪|池|湖|潭|源"),
+        ("人物姓氏", r"人|王|公|姓|氏|皇|后|妃"),
+        ("历史沿革", r"故|旧|改|徙|废|罢|徙|新置"),
+        ("抽象语义/取义", r"取.*?之义|取.*?名之|以.*?为名"),
+    ], "其他"),
+    "weak_source": ("WEAK", [
+        ("书证(带书名号)", r"《.*?》"),
+        ("口传/泛称", r"云|曰|谓之"),
+        ("考据注释", r"按|注|据"),
+    ], "其他引证"),
+    "none_focus": ("NONE", [
+        ("空间距离", r"\d+?里|\d+?步|距离|远近"),
+        ("户籍经济", r"\d+?户|\d+?口|民|租|调"),
+        ("四至方位", r"东|西|南|北|至"),
+        ("政区变更", r"置|废|改为|属"),
+    ], "纯地理特征"),
+}
+
+
+def load_results(path=INPUT_FILE):
+    """一次性读入分类结果，只取分析所需列，并用向量化 str.len() 计算文本长度。"""
+    df = read_table(path, columns=[RECORD_ID, "placename", "text", "source", "resolution_type"]).fillna("")
+    df = ensure_ids(df)
+    df["text"] = df["text"].astype(str)
+    df["text_len"] = df["text"].str.len()
+    return df
+
+
+def first_match(texts, rules, default):
+    """按规则顺序做向量化匹配，已命中的行不再参与后续规则。"""
+    labels = pd.Series(default, index=texts.index, dtype=object)
+    remaining = texts
+    for label, pattern in rules:
+        hit = remaining.str.contains(pattern, regex=True)
+        labels.loc[hit.index[hit.to_numpy()]] = label
+        remaining = remaining[~hit]
+    return labels
+
+
+def _dimension_stats(dimension, labels, lengths, scope, resolution_type):
+    counts = labels.value_counts()
+    avg_len = lengths.groupby(labels).mean()
+    return pd.DataFrame({
+        "dimension": dimension,
+        "resolution_type": resolution_type if resolution_type is not None else counts.index,
+        "category": counts.index,
+        "count": counts.to_numpy(),
+        "pct": (counts / scope * 100).round(2).to_numpy() if scope else 0.0,
+        "avg_len": avg_len.reindex(counts.index).to_numpy(),
+    })
+
+
+def record_subtypes(df):
+    """逐条记录的子类：record_id 加各维度一列，记录不适用的维度留空。"""
+    subtypes = pd.DataFrame({RECORD_ID: df[RECORD_ID]}, index=df.index)
+    for dimension, (label, rules, default) in SUBTYPE_RULES.items():
+        subset = df[df["resolution_type"] == label]
+        subtypes[dimension] = first_match(subset["text"], rules, default).reindex(df.index).fillna("")
+    return subtypes
+
+
+def compute_stats(df, subtypes=None):
+    """
+    生成整洁格式的统计表：每行一个 (维度, 类别, 子类)，含数量、百分比与平均文本长度。
+    百分比的分母为该维度适用的记录数。各维度内按数量降序排列。
+    subtypes 为 record_subtypes 的结果，缺省时现算。
+    """
+    if subtypes is None:
+        subtypes = record_subtypes(df)
+    frames = [_dimension_stats("resolution_type", df["resolution_type"], df["text_len"], len(df), None)]
+    for dimension, (label, rules, default) in SUBTYPE_RULES.items():
+        applies = (df["resolution_type"] == label).to_numpy()
+        if not applies.any():
+            continue
+        frames.append(_dimension_stats(dimension, subtypes.loc[applies, dimension], df.loc[applies, "text_len"],
+                                       int(applies.sum()), label))
+    return pd.concat(frames, ignore_index=True)
+
+
+def dimension_counts(stats, dimension):
+    """取出某一维度的 子类 -> 数量 序列，顺序与 value_counts 一致。"""
+    part = stats[stats["dimension"] == dimension]
+    return pd.Series(part["count"].to_numpy(), index=part["category"].to_numpy(), name="count")
+
+
+def summary_report(stats):
+    """analysis_summary_en.csv：各类别数量与平均长度。"""
+    part = stats[stats["dimension"] == "resolution_type"].sort_values("category")
+    return pd.DataFrame({"Count": part["count"].to_numpy(), "Avg_Length": part["avg_len"].to_numpy()},
+                        index=pd.Index(part["category"].to_numpy(), name="resolution_type"))
+
+
+def strong_logic_report(stats):
+    """mining_strong_logic.csv：STRONG 类命名逻辑子类的数量与百分比。"""
+    part = stats[stats["dimension"] == "strong_logic"]
+    return pd.DataFrame({"数量": part["count"].to_numpy(), "百分比(%)": part["pct"].to_numpy()},
+                        index=pd.Index(part["category"].to_numpy(), name="logic_type"))
+
+
+def write_reports(stats):
+    stats.to_csv(STATS_FILE, index=False, encoding='utf-8-sig')
+    summary_report(stats).to_csv("analysis_summary_en.csv")
+    strong_logic_report(stats).to_csv("mining_strong_logic.csv", encoding='utf-8-sig')
+
+
+def analysis_figures(df, stats):
+    """analyze_results 的三张图：类别饼图、长度箱线图、STRONG 子类柱状图。"""
+    return [
+        ("category_pie", {"counts": dimension_counts(stats, "resolution_type")}, "stat_category_pie"),
+        ("length_boxplot", {"lengths": df[["resolution_type", "text_len"]]}, "stat_length_boxplot"),
+        ("strong_subtypes", {"counts": dimension_counts(stats, "strong_subtype")}, "stat_strong_subtypes"),
+    ]
+
+
+def mining_figures(stats):
+    """deep_data_mining 的三合一深度统计图。"""
+    return [("mining_panels", {
+        "strong": dimension_counts(stats, "strong_logic"),
+        "weak": dimension_counts(stats, "weak_source"),
+        "none": dimension_counts(stats, "none_focus"),
+    }, "mining_deep_analysis")]
+
+
+def add_plot_arguments(parser):
+    parser.add_argument("--no-plots", action="store_true", help="只生成 CSV 统计，不绘图")
+    parser.add_argument("--formats", default="png", help="图片格式，逗号分隔，如 png,svg")
+    parser.add_argument("--workers", type=int, default=None, help="并行绘图的进程数")
+
+
+def run_reports(path=INPUT_FILE, plots=True, formats=("png",), workers=None):
+    """一次读入，写出整洁统计表与两套 CSV 报告，并按需并行绘制全部图表。"""
+    start = time.perf_counter()
+    df = load_results(path)
+    subtypes = record_subtypes(df)
+    stats = compute_stats(df, subtypes)
+    write_reports(stats)
+    # 逐条子类按 record_id 与分类结果表联接，无需按文本重新筛选
+    subtypes.to_csv(RECORD_SUBTYPES_FILE, index=False, encoding='utf-8-sig')
+    METRICS.throughput("report", time.perf_counter() - start, records=len(df))
+    outputs = [STATS_FILE, RECORD_SUBTYPES_FILE, "analysis_summary_en.csv", "mining_strong_logic.csv"]
+    if plots:
+        from common.plotting import render_figures
+        outputs += render_figures(analysis_figures(df, stats) + mining_figures(stats), formats, workers)
+    return outputs
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="一次读入分类结果，生成整洁统计表、CSV 报告与图表")
+    parser.add_argument("--input", default=INPUT_FILE)
+    add_plot_arguments(parser)
+    args = parser.parse_args()
+
+    if not table_exists(args.input):
+        print("错误：未找到数据文件。")
+    else:
+        from common.plotting import parse_formats
+        with stage("report"):
+            outputs = run_reports(args.input, not args.no_plots, parse_formats(args.formats), args.workers)
+        print("已生成：" + "、".join(outputs))
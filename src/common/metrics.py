@@ -0,0 +1,161 @@
+import cProfile
+import json
+import os
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+
+METRICS_JSON = os.environ.get("TOPONYM_METRICS_JSON", "metrics.json")
+METRICS_PROM = os.environ.get("TOPONYM_METRICS_PROM", "metrics.prom")
+# 逗号分隔的阶段名，或 all；为空时不做 cProfile
+PROFILE_STAGES = os.environ.get("TOPONYM_PROFILE", "")
+CHECKPOINT_INTERVAL = 10.0
+PREFIX = "toponym_"
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.0, 5.0, 10.0, 30.0, 60.0)
+
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _format_labels(key, extra=()):
+    pairs = list(key) + list(extra)
+    if not pairs:
+        return ""
+    escaped = [(k, v.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in escaped) + "}"
+
+
+class Metrics:
+    """
+    各阶段共用的轻量指标表：计数器、仪表值与直方图，均可带标签，线程安全。
+    按检查点写出 JSON 摘要与 Prometheus 文本格式文件。
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.counters = {}
+        self.gauges = {}
+        self.histograms = {}
+        self._last_write = 0.0
+
+    def inc(self, name, value=1, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name, value, **labels):
+        with self.lock:
+            self.gauges.setdefault(name, {})[_label_key(labels)] = value
+
+    def observe(self, name, value, buckets=LATENCY_BUCKETS, **labels):
+        key = _label_key(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            hist = series.get(key)
+            if hist is None:
+                hist = series[key] = {"buckets": list(buckets), "counts": [0] * len(buckets), "sum": 0.0, "count": 0}
+            for i, bound in enumerate(hist["buckets"]):
+                if value <= bound:
+                    hist["counts"][i] += 1
+            hist["sum"] += value
+            hist["count"] += 1
+
+    @contextmanager
+    def timer(self, name, **labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels)
+
+    def throughput(self, stage, seconds, **counts):
+        """记录阶段内各类计数及其每秒处理量，如 throughput("extract", 3.2, records=100, fragments=900)。"""
+        for unit, count in counts.items():
+            self.set("stage_items", count, stage=stage, unit=unit)
+            if seconds > 0:
+                self.set("stage_items_per_second", round(count / seconds, 3), stage=stage, unit=unit)
+
+    def snapshot(self):
+        def unpack(series):
+            return [{"labels": dict(k), "value": v} for k, v in series.items()]
+
+        with self.lock:
+            return {
+                "updated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                "counters": {n: unpack(s) for n, s in sorted(self.counters.items())},
+                "gauges": {n: unpack(s) for n, s in sorted(self.gauges.items())},
+                "histograms": {n: [{"labels": dict(k), **h} for k, h in s.items()]
+                               for n, s in sorted(self.histograms.items())},
+            }
+
+    def prometheus_text(self):
+        lines = []
+        with self.lock:
+            for kind, table in (("counter", self.counters), ("gauge", self.gauges)):
+                for name, series in sorted(table.items()):
+                    full = PREFIX + name
+                    lines.append(f"# TYPE {full} {kind}")
+                    for key, value in series.items():
+                        lines.append(f"{full}{_format_labels(key)} {value}")
+            for name, series in sorted(self.histograms.items()):
+                full = PREFIX + name
+                lines.append(f"# TYPE {full} histogram")
+                for key, hist in series.items():
+                    for bound, count in zip(hist["buckets"], hist["counts"]):
+                        lines.append(f"{full}_bucket{_format_labels(key, [('le', str(bound))])} {count}")
+                    lines.append(f"{full}_bucket{_format_labels(key, [('le', '+Inf')])} {hist['count']}")
+                    lines.append(f"{full}_sum{_format_labels(key)} {hist['sum']}")
+                    lines.append(f"{full}_count{_format_labels(key)} {hist['count']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, json_path=None, prom_path=None):
+        """原子写出两种格式；路径缺省取 METRICS_JSON / METRICS_PROM。"""
+        json_path = json_path or METRICS_JSON
+        prom_path = prom_path or METRICS_PROM
+        for path, content in ((json_path, json.dumps(self.snapshot(), ensure_ascii=False, indent=1)),
+                              (prom_path, self.prometheus_text())):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(content)
+            os.replace(tmp_path, path)
+        self._last_write = time.monotonic()
+
+    def checkpoint(self, interval=CHECKPOINT_INTERVAL):
+        """长循环中调用：距上次写出超过 interval 秒才落盘。"""
+        if time.monotonic() - self._last_write >= interval:
+            self.write()
+
+
+METRICS = Metrics()
+
+
+def profiling_enabled(stage):
+    wanted = {s.strip() for s in PROFILE_STAGES.split(",") if s.strip()}
+    return "all" in wanted or stage in wanted
+
+
+@contextmanager
+def stage(name, profile=None):
+    """
+    包裹一个阶段：记录墙钟耗时，结束时写出指标。
+    profile 为 True（或 TOPONYM_PROFILE 包含该阶段）时同时做 cProfile，
+    结果存为 profile_<阶段>.prof 并打印累计耗时前 15 项。
+    """
+    profiler = cProfile.Profile() if (profile if profile is not None else profiling_enabled(name)) else None
+    start = time.perf_counter()
+    if profiler:
+        profiler.enable()
+    try:
+        yield METRICS
+    finally:
+        if profiler:
+            profiler.disable()
+            path = f"profile_{name}.prof"
+            profiler.dump_stats(path)
+            print(f"[profile] {name} 已保存至 {path}")
+            pstats.Stats(profiler).sort_stats("cumulative").print_stats(15)
+        METRICS.set("stage_seconds", round(time.perf_counter() - start, 6), stage=name)
+        METRICS.write()
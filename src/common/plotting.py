@@ -0,0 +1,116 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+DEFAULT_FORMATS = ("png",)
+
+
+def _pyplot(chinese=False):
+    """绘图库在真正需要出图时才导入，并固定使用无界面的 Agg 后端。"""
+    import matplotlib
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+    import seaborn as sns
+
+    if chinese:
+        plt.rcParams['font.sans-serif'] = ['Arial Unicode MS', 'Heiti TC', 'SimHei']
+        plt.rcParams['axes.unicode_minus'] = False
+        sns.set_theme(style="whitegrid")
+    else:
+        sns.set_theme(style="whitegrid")
+        plt.rcParams['axes.unicode_minus'] = False
+    return plt, sns
+
+
+def _save(plt, stem, formats):
+    paths = []
+    for fmt in formats:
+        path = f"{stem}.{fmt}"
+        plt.savefig(path, dpi=300)
+        paths.append(path)
+    plt.close()
+    return paths
+
+
+def category_pie(data, stem, formats):
+    plt, sns = _pyplot()
+    counts = data["counts"]
+    plt.figure(figsize=(10, 8))
+    plt.pie(counts, labels=counts.index, autopct='%1.1f%%', startangle=140,
+            colors=sns.color_palette("muted"), textprops={'fontsize': 14})
+    plt.title("Distribution of Placename Explanations", fontsize=16, fontweight='bold')
+    return _save(plt, stem, formats)
+
+
+def length_boxplot(data, stem, formats):
+    plt, sns = _pyplot()
+    plt.figure(figsize=(10, 6))
+    sns.boxplot(x='resolution_type', y='text_len', data=data["lengths"], palette="Set2")
+    plt.title("Text Length Distribution by Category", fontsize=16, fontweight='bold')
+    plt.xlabel("Category Label", fontsize=12)
+    plt.ylabel("Character Length", fontsize=12)
+    return _save(plt, stem, formats)
+
+
+def strong_subtypes(data, stem, formats):
+    plt, sns = _pyplot()
+    sub_counts = data["counts"]
+    plt.figure(figsize=(12, 7))
+    sns.barplot(x=sub_counts.index, y=sub_counts.values, palette="viridis")
+    plt.title("Sub-categories of STRONG Explanations", fontsize=16, fontweight='bold')
+    plt.xlabel("Naming Logic Pattern", fontsize=12)
+    plt.ylabel("Number of Records", fontsize=12)
+    plt.xticks(rotation=15)
+    return _save(plt, stem, formats)
+
+
+def mining_panels(data, stem, formats):
+    plt, sns = _pyplot(chinese=True)
+    strong_logic_counts, weak_counts, none_counts = data["strong"], data["weak"], data["none"]
+
+    fig, axes = plt.subplots(1, 3, figsize=(20, 7))
+
+    sns.barplot(x=strong_logic_counts.index, y=strong_logic_counts.values, ax=axes[0], palette="viridis")
+    axes[0].set_title("STRONG 类：命名逻辑子类分布")
+    axes[0].tick_params(axis='x', rotation=45)
+
+    axes[1].pie(weak_counts, labels=weak_counts.index, autopct='%1.1f%%', startangle=140, colors=sns.color_palette("pastel"))
+    axes[1].set_title("WEAK 类：引证方式特征")
+
+    sns.barplot(x=none_counts.index, y=none_counts.values, ax=axes[2], palette="magma")
+    axes[2].set_title("NONE 类：地理描述重点分布")
+    axes[2].tick_params(axis='x', rotation=45)
+
+    plt.tight_layout()
+    return _save(plt, stem, formats)
+
+
+FIGURES = {
+    "category_pie": category_pie,
+    "length_boxplot": length_boxplot,
+    "strong_subtypes": strong_subtypes,
+    "mining_panels": mining_panels,
+}
+
+
+def _render(job):
+    kind, data, stem, formats = job
+    return FIGURES[kind](data, stem, formats)
+
+
+def render_figures(jobs, formats=DEFAULT_FORMATS, workers=None):
+    """
+    jobs 为 [(图类型, 数据, 输出文件名前缀)]。多张图时在进程池中并行绘制，
+    返回生成的文件路径列表。
+    """
+    tasks = [(kind, data, stem, tuple(formats)) for kind, data, stem in jobs]
+    workers = min(len(tasks), workers or os.cpu_count() or 1)
+    if workers > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            results = list(pool.map(_render, tasks))
+    else:
+        results = [_render(task) for task in tasks]
+    return [path for paths in results for path in paths]
+
+
+def parse_formats(value):
+    return tuple(f.strip().lstrip(".") for f in value.split(",") if f.strip())
@@ -0,0 +1,35 @@
+import hashlib
+
+RECORD_ID = "record_id"
+RECORD_COLUMNS = [RECORD_ID, "placename", "text", "source"]
+
+
+def record_id(placename, text, source):
+    """
+    (地名, 文本, 出处) 的内容哈希：128 位十六进制串，百万级记录下碰撞概率可忽略。
+    抽取阶段按解析前的地名分配，之后各阶段原样沿用，解析改写地名不改变 ID；
+    因此按解析后内容现算的键与之不同，旧版进度须经 CheckpointJournal.adopt_ids 对照迁移。
+    """
+    return hashlib.blake2b(f"{source}\0{placename}\0{text}".encode("utf-8"), digest_size=16).hexdigest()
+
+
+def ensure_ids(df):
+    """
+    保证表中有 record_id 列（置于首列）。抽取阶段已分配的 ID 原样沿用，
+    旧版中间表缺少该列时按当前的 地名/文本/出处 现算。
+    """
+    if RECORD_ID in df.columns:
+        return df
+    ids = [record_id(p, t, s) for p, t, s in
+           zip(df["placename"].astype(str), df["text"].astype(str), df["source"].astype(str))]
+    df = df.copy()
+    df.insert(0, RECORD_ID, ids)
+    return df
+
+
+def record_key(record):
+    """断点日志与各阶段联接所用的键：优先取 record_id，旧版结果（无该字段）按内容现算。"""
+    rid = record.get(RECORD_ID)
+    if isinstance(rid, str) and rid:
+        return rid
+    return record_id(record["placename"], record["text"], record["source"])
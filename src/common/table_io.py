@@ -0,0 +1,189 @@
+import argparse
+import os
+
+import pandas as pd
+
+# csv | parquet | arrow；可用环境变量 TOPONYM_TABLE_FORMAT 统一切换各阶段的中间表格式
+TABLE_FORMAT = os.environ.get("TOPONYM_TABLE_FORMAT", "csv")
+EXTENSIONS = {"csv": ".csv", "parquet": ".parquet", "arrow": ".arrow"}
+# 取值重复度高的列以字典编码存储
+CATEGORY_COLUMNS = ["placename", "source", "resolution_type"]
+
+
+def table_path(path, fmt=None):
+    """把以 .csv 命名的表替换为当前格式对应的扩展名。"""
+    stem, _ = os.path.splitext(path)
+    return stem + EXTENSIONS[fmt or TABLE_FORMAT]
+
+
+def existing_table(path):
+    """
+    各阶段以 .csv 名称引用中间表：优先返回当前格式的文件，其次返回任意已存在的格式。
+    显式给出的非 CSV 路径原样使用。都不存在时返回 None。
+    """
+    if _format_of(path) != "csv" and os.path.exists(path):
+        return path
+    preferred = table_path(path)
+    if os.path.exists(preferred):
+        return preferred
+    for fmt in EXTENSIONS:
+        candidate = table_path(path, fmt)
+        if os.path.exists(candidate):
+            return candidate
+    return None
+
+
+def table_exists(path):
+    return existing_table(path) is not None
+
+
+def _format_of(path):
+    ext = os.path.splitext(path)[1]
+    for fmt, known in EXTENSIONS.items():
+        if ext == known:
+            return fmt
+    return "csv"
+
+
+def _decode_categories(df, categorical):
+    if not categorical:
+        for col in df.columns:
+            if isinstance(df[col].dtype, pd.CategoricalDtype):
+                df[col] = df[col].astype(object)
+    return df
+
+
+def _parquet_columns(path, columns):
+    """与 CSV/Arrow 一致：请求的列中文件没有的直接忽略（如旧版中间表缺少 record_id）。"""
+    if not columns:
+        return columns
+    import pyarrow.parquet as pq
+    names = set(pq.read_schema(path).names)
+    return [c for c in columns if c in names]
+
+
+def read_table(path, columns=None, categorical=False):
+    """
+    读取中间表。columns 只加载所需列（Parquet/Arrow 按列读取，不解析其余列）。
+    默认把字典编码列还原为普通字符串列，与 CSV 读取结果的用法保持一致。
+    """
+    actual = existing_table(path)
+    if actual is None:
+        raise FileNotFoundError(path)
+    fmt = _format_of(actual)
+    if fmt == "parquet":
+        df = pd.read_parquet(actual, columns=_parquet_columns(actual, columns))
+    elif fmt == "arrow":
+        import pyarrow as pa
+        with pa.memory_map(actual, "r") as source:
+            table = pa.ipc.open_file(source).read_all()
+        if columns:
+            table = table.select([c for c in columns if c in table.column_names])
+        df = table.to_pandas()
+    else:
+        usecols = (lambda c: c in columns) if columns else None
+        df = pd.read_csv(actual, usecols=usecols, encoding='utf-8-sig')
+    return _decode_categories(df, categorical)
+
+
+def iter_table(path, chunksize, columns=None):
+    """按块读取中间表，每块为一个 DataFrame。"""
+    actual = existing_table(path)
+    if actual is None:
+        raise FileNotFoundError(path)
+    fmt = _format_of(actual)
+    if fmt == "parquet":
+        import pyarrow.parquet as pq
+        for batch in pq.ParquetFile(actual).iter_batches(batch_size=chunksize,
+                                                         columns=_parquet_columns(actual, columns)):
+            yield _decode_categories(batch.to_pandas(), False)
+    elif fmt == "arrow":
+        import pyarrow as pa
+        with pa.memory_map(actual, "r") as source:
+            reader = pa.ipc.open_file(source)
+            for i in range(reader.num_record_batches):
+                df = reader.get_batch(i).to_pandas()
+                df = df[[c for c in columns if c in df.columns]] if columns else df
+                for start in range(0, len(df), chunksize):
+                    yield _decode_categories(df.iloc[start:start + chunksize], False)
+    else:
+        usecols = (lambda c: c in columns) if columns else None
+        yield from pd.read_csv(actual, usecols=usecols, chunksize=chunksize, encoding='utf-8-sig')
+
+
+def _encode_categories(df):
+    df = df.copy()
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+class TableWriter:
+    """按块追加写入中间表；close 时原子替换目标文件。"""
+
+    def __init__(self, path, fmt=None):
+        self.fmt = fmt or TABLE_FORMAT
+        self.path = table_path(path, self.fmt)
+        self.tmp_path = self.path + ".tmp"
+        self._writer = None
+        self._schema = None
+        self.rows = 0
+
+    def write(self, df):
+        if self.fmt == "csv":
+            df.to_csv(self.tmp_path, index=False, mode="a" if self.rows else "w",
+                      header=not self.rows, encoding='utf-8' if self.rows else 'utf-8-sig')
+        else:
+            import pyarrow as pa
+            if self._schema is None:
+                # 各块的字典内容不同，统一用字符串字典类型保证 schema 一致；
+                # Arrow IPC 文件不允许跨批次替换字典，分块写出时退化为普通字符串列
+                dictionary = self.fmt == "parquet"
+                fields = [pa.field(c, pa.dictionary(pa.int32(), pa.string())
+                                   if dictionary and c in CATEGORY_COLUMNS else pa.string())
+                          for c in df.columns]
+                self._schema = pa.schema(fields)
+            frame = _encode_categories(df.astype(str)) if self.fmt == "parquet" else df.astype(str)
+            table = pa.Table.from_pandas(frame, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                if self.fmt == "parquet":
+                    import pyarrow.parquet as pq
+                    self._writer = pq.ParquetWriter(self.tmp_path, self._schema)
+                else:
+                    self._writer = pa.ipc.new_file(self.tmp_path, self._schema)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self):
+        if self._writer is not None:
+            self._writer.close()
+        if os.path.exists(self.tmp_path):
+            os.replace(self.tmp_path, self.path)
+        return self.path
+
+
+def write_table(df, path, fmt=None):
+    """整表写出（先写临时文件再原子替换），返回实际写入的路径。"""
+    fmt = fmt or TABLE_FORMAT
+    target = table_path(path, fmt)
+    tmp_path = target + ".tmp"
+    if fmt == "parquet":
+        _encode_categories(df).to_parquet(tmp_path, index=False)
+    elif fmt == "arrow":
+        import pyarrow as pa
+        table = pa.Table.from_pandas(_encode_categories(df), preserve_index=False)
+        with pa.OSFile(tmp_path, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    else:
+        df.to_csv(tmp_path, index=False, encoding='utf-8-sig')
+    os.replace(tmp_path, target)
+    return target
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在 CSV / Parquet / Arrow 中间表之间转换，便于人工查看")
+    parser.add_argument("path", help="待转换的表文件")
+    parser.add_argument("--to", default="csv", choices=sorted(EXTENSIONS))
+    args = parser.parse_args()
+    print(f"已写出：{write_table(read_table(args.path), args.path, args.to)}")
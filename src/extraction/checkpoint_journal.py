@@ -0,0 +1,251 @@
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from common.record_ids import RECORD_ID
+from common.table_io import TableWriter, iter_table, table_exists
+
+# 记录以 record_id 开头时，续跑只需切出该字段，不必解析整行 JSON
+ID_PREFIX = ('{"' + RECORD_ID + '": "').encode("utf-8")
+COMPACT_CHUNK = 50000
+
+
+def _isin(sorted_ids, ids):
+    """ids（十六进制串）中哪些出现在排序后的摘要数组里，返回布尔数组。"""
+    ids = list(ids)
+    if not len(sorted_ids) or not ids:
+        return np.zeros(len(ids), dtype=bool)
+    wanted = np.array([bytes.fromhex(i) for i in ids], dtype="S16")
+    pos = np.searchsorted(sorted_ids, wanted).clip(max=len(sorted_ids) - 1)
+    return sorted_ids[pos] == wanted
+
+
+def _json_default(value):
+    # pandas 行中的 numpy 标量
+    if hasattr(value, "item"):
+        return value.item()
+    return str(value)
+
+
+class CheckpointJournal:
+    """
+    JSON Lines 格式的追加式断点日志。
+    每条分类结果只追加一行，每 fsync_every 条调用一次 fsync；
+    续跑时只扫描各行开头的记录 ID，整行 JSON 推迟到需要完整记录时才逐行解析；
+    任务结束后按块压实为结果表，同一 record_id 只保留最先写入的一条。
+    已处理 ID 存为排序后的 128 位摘要数组（每条 16 字节，按完整 ID 比较，不会误判）；
+    本次运行新追加的摘要先写入字节缓冲，下次查询时一次并入排序数组。
+    """
+
+    def __init__(self, path, key_func, fsync_every=20):
+        self.path = path
+        self.key_func = key_func
+        self.fsync_every = fsync_every
+        self.count = 0
+        self._ids = np.empty(0, dtype="S16")
+        self._new_ids = bytearray()
+        # 没有 record_id 字段的旧版记录条数，由 adopt_ids 迁移
+        self.legacy = 0
+        # load 时跳过的损坏行数
+        self.corrupt = 0
+        # 最近一次压实时因不在当前输入中而略去的记录条数
+        self.stale = 0
+        self._unsynced = 0
+        self._fh = None
+
+    def _line_key(self, raw):
+        # 只有以 } 结尾的完整行才走快速路径，中途截断或损坏的行交给整行解析去报错
+        if raw.startswith(ID_PREFIX) and raw.rstrip().endswith(b"}"):
+            end = raw.find(b'"', len(ID_PREFIX))
+            if end > 0:
+                return raw[len(ID_PREFIX):end].decode("utf-8")
+        # 旧版日志行不以 record_id 开头，退回整行解析
+        return self.key_func(json.loads(raw))
+
+    def load(self):
+        """
+        扫描日志建立已处理 ID 索引。崩溃时写了一半的末行（没有换行符）会被截掉；
+        中间无法解析的行跳过并告警，其记录下次按未处理对待。
+        """
+        if not os.path.exists(self.path):
+            return self
+        offset, partial = 0, False
+        digests = bytearray()
+        with open(self.path, "rb") as f:
+            for lineno, raw in enumerate(f, 1):
+                if not raw.endswith(b"\n"):
+                    # 只有最后一行可能缺换行符
+                    partial = True
+                    break
+                offset += len(raw)
+                try:
+                    digest = bytes.fromhex(self._line_key(raw))
+                    if len(digest) != 16:
+                        raise ValueError(digest)
+                except (ValueError, KeyError, TypeError, AttributeError):
+                    print(f"警告：{self.path} 第 {lineno} 行无法解析，已跳过。")
+                    self.corrupt += 1
+                    continue
+                digests += digest
+                self.count += 1
+                self.legacy += not raw.startswith(ID_PREFIX)
+        if partial:
+            with open(self.path, "r+b") as f:
+                f.truncate(offset)
+        self._ids = np.sort(np.frombuffer(bytes(digests), dtype="S16"))
+        return self
+
+    def iter_records(self):
+        """逐行解析日志中的记录，不在内存中保留全表；load 已告警的损坏行直接略过。"""
+        self.flush()
+        if not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            for raw in f:
+                try:
+                    record = json.loads(raw)
+                except ValueError:
+                    continue
+                if isinstance(record, dict):
+                    yield record
+
+    def seed_from_csv(self, csv_path):
+        """从旧版整表进度文件迁移到日志，仅在日志为空时执行一次。"""
+        if self.count or not table_exists(csv_path):
+            return
+        for chunk in iter_table(csv_path, COMPACT_CHUNK):
+            for record in chunk.fillna("").to_dict('records'):
+                self.append(record)
+        self.flush(sync=True)
+
+    def adopt_ids(self, pairs):
+        """
+        给旧版记录补上输入表中的 record_id 并重写日志。抽取阶段的 ID 按解析前的地名计算，
+        旧版记录只保存了解析后的内容，按内容现算的键与之对不上。
+        pairs 逐条给出输入表的 (按当前内容现算的键, record_id)；对不上的记录沿用现算的键。
+        返回对上的条数。
+        """
+        if not self.legacy:
+            return 0
+        wanted = {self.key_func(r): None for r in self.iter_records() if not r.get(RECORD_ID)}
+        for key, rid in pairs:
+            if key in wanted and wanted[key] is None:
+                wanted[key] = rid
+        self.close()
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, "w", encoding="utf-8") as out:
+            for record in self.iter_records():
+                if not record.get(RECORD_ID):
+                    key = self.key_func(record)
+                    record.pop(RECORD_ID, None)
+                    record = {RECORD_ID: wanted.get(key) or key, **record}
+                out.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+            out.flush()
+            os.fsync(out.fileno())
+        os.replace(tmp_path, self.path)
+        self.count = self.legacy = self.corrupt = 0
+        self._ids = np.empty(0, dtype="S16")
+        self._new_ids = bytearray()
+        self.load()
+        return sum(rid is not None for rid in wanted.values())
+
+    def _merge_new_ids(self):
+        """
+        把缓冲的新摘要并入已排序数组：只排序新增的这一批，再按 searchsorted 的位置插入，
+        每块的开销与已处理总数成线性，不再整体重排。
+        """
+        if self._new_ids:
+            new = np.sort(np.frombuffer(bytes(self._new_ids), dtype="S16"))
+            self._ids = np.insert(self._ids, np.searchsorted(self._ids, new), new)
+            self._new_ids = bytearray()
+
+    def _duplicate_ids(self):
+        """日志中出现不止一次的 ID 摘要。"""
+        self._merge_new_ids()
+        ids = self._ids
+        # S16 转成 Python bytes 时会去掉末尾的 0 字节，补齐到 16 字节再与 bytes.fromhex 的结果比较
+        return {d.ljust(16, b"\0") for d in ids[1:][ids[1:] == ids[:-1]].tolist()}
+
+    def contains_many(self, ids):
+        """一组记录 ID 是否已处理，返回布尔数组。"""
+        self._merge_new_ids()
+        return _isin(self._ids, ids)
+
+    def __contains__(self, key):
+        return bool(self.contains_many([key])[0])
+
+    def __len__(self):
+        return self.count
+
+    def append(self, record):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(json.dumps(record, ensure_ascii=False, default=_json_default) + "\n")
+        self._fh.flush()
+        self._new_ids += bytes.fromhex(self.key_func(record))
+        self.count += 1
+        self.legacy += not record.get(RECORD_ID)
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.flush(sync=True)
+
+    def flush(self, sync=False):
+        if self._fh is None:
+            return
+        self._fh.flush()
+        if sync:
+            os.fsync(self._fh.fileno())
+            self._unsynced = 0
+
+    def close(self):
+        if self._fh is not None:
+            self.flush(sync=True)
+            self._fh.close()
+            self._fh = None
+
+    def compact(self, path, columns, chunksize=COMPACT_CHUNK, on_chunk=None, keep=None):
+        """
+        按块把日志写成完整结果表（原子替换），内存占用只与块大小有关。
+        columns 为结果表的列，日志中缺少的字段留空；每块写出后调用 on_chunk(块)。
+        keep 为当前输入表各 ID 的 16 字节摘要拼接而成的字节串时，只写出其中的记录：
+        语料改动后旧记录的结果仍留在日志里（内容改回时可复用），但不再进入结果表。返回总行数。
+        """
+        self.stale = 0
+        if keep is not None:
+            keep = np.sort(np.frombuffer(bytes(keep), dtype="S16"))
+        self.close()
+        duplicates, seen = self._duplicate_ids(), set()
+        writer = TableWriter(path)
+        writer.write(pd.DataFrame(columns=columns))
+        batch = []
+
+        def emit():
+            df = pd.DataFrame(batch, columns=columns).fillna("")
+            if keep is not None:
+                current = _isin(keep, df[RECORD_ID])
+                self.stale += int((~current).sum())
+                df = df[current]
+            writer.write(df)
+            if on_chunk:
+                on_chunk(df)
+            batch.clear()
+
+        for record in self.iter_records():
+            if not record.get(RECORD_ID):
+                # 旧版日志行没有 record_id，压实时补齐
+                record[RECORD_ID] = self.key_func(record)
+            if duplicates:
+                digest = bytes.fromhex(record[RECORD_ID])
+                if digest in duplicates:
+                    if digest in seen:
+                        continue
+                    seen.add(digest)
+            batch.append(record)
+            if len(batch) >= chunksize:
+                emit()
+        if batch:
+            emit()
+        writer.close()
+        return writer.rows
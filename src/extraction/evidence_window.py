@@ -0,0 +1,92 @@
+import argparse
+import os
+import re
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.table_io import read_table, table_exists
+
+# 送入 LLM 的文本预算（字），与原先固定截断的 120 字一致；不超过预算的记录原样发送
+WINDOW_CHARS = 120
+# 成词的命名句式权重高于单字标记：“以”“故”单用时多为虚词
+NAMING_PHRASES = re.compile(r"故名|故曰|改曰|為名|名之|之義")
+CAUSAL_MARKERS = frozenset("因故以取")
+CITATION_MARKERS = frozenset("曰云《》按謂")
+CLAUSE = re.compile(r"[^。；！？]+[。；！？]*")
+GAP = "…"
+
+
+def clause_score(clause, placename):
+    """命名句式 3 分，因果标记、引证标记与地名各 1 分；0 分的子句不入选。"""
+    chars = set(clause)
+    score = 3 if NAMING_PHRASES.search(clause) else 0
+    score += 1 if chars & CAUSAL_MARKERS else 0
+    score += 1 if chars & CITATION_MARKERS else 0
+    score += 1 if placename and placename in clause else 0
+    return score
+
+
+def trim_clause(clause, budget):
+    """单个子句超出预算时，截取命名句式（没有则首个因果标记）前后的一段。"""
+    m = NAMING_PHRASES.search(clause)
+    hit = m.start() if m else next((i for i, ch in enumerate(clause) if ch in CAUSAL_MARKERS), 0)
+    start = max(0, min(hit - budget // 3, len(clause) - budget))
+    return clause[start:start + budget]
+
+
+def evidence_window(text, placename="", budget=WINDOW_CHARS):
+    """
+    在预算内拼出与命名解释最相关的子句：按得分从高到低、同分按原文先后贪心选取，
+    再按原文顺序拼接，不相邻的子句之间以“…”隔开。没有任何标记时退回前 budget 字。
+    """
+    text = str(text)
+    if len(text) <= budget:
+        return text
+    clauses = [(m.start(), m.group()) for m in CLAUSE.finditer(text)]
+    ranked = sorted(((clause_score(c, placename), start, i) for i, (start, c) in enumerate(clauses)),
+                    key=lambda x: (-x[0], x[1]))
+    chosen, used = {}, 0
+    for score, _, i in ranked:
+        if score == 0:
+            break
+        clause = clauses[i][1]
+        if not chosen and len(clause) > budget:
+            chosen[i] = trim_clause(clause, budget)
+            break
+        cost = len(clause) + len(GAP)
+        if used + cost <= budget:
+            chosen[i] = clause
+            used += cost
+    if not chosen:
+        return text[:budget]
+
+    parts, last = [], None
+    for i in sorted(chosen):
+        if last is not None and i != last + 1:
+            parts.append(GAP)
+        parts.append(chosen[i])
+        last = i
+    return "".join(parts)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="对比固定截断与证据窗口：送入 LLM 的字数与标记覆盖")
+    parser.add_argument("--input", default="placename_records_resolved.csv")
+    parser.add_argument("--budget", type=int, default=WINDOW_CHARS)
+    args = parser.parse_args()
+
+    if not table_exists(args.input):
+        print(f"错误：找不到 {args.input}")
+        sys.exit(1)
+    df = read_table(args.input, columns=["placename", "text"]).fillna("")
+    long = df[df["text"].astype(str).str.len() > args.budget]
+    causal_late = windowed = 0
+    window_chars = 0
+    for placename, text in zip(long["placename"].astype(str), long["text"].astype(str)):
+        window = evidence_window(text, placename, args.budget)
+        window_chars += len(window)
+        if not NAMING_PHRASES.search(text[:args.budget]) and NAMING_PHRASES.search(text):
+            causal_late += 1
+            windowed += bool(NAMING_PHRASES.search(window))
+    print(f"共 {len(df)} 条，超出预算 {len(long)} 条；窗口平均 {window_chars / max(1, len(long)):.1f} 字。")
+    print(f"命名句式只出现在前 {args.budget} 字之后的记录 {causal_late} 条，窗口覆盖其中 {windowed} 条。")
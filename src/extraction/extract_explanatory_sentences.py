@@ -1,17 +1,49 @@
 import pandas as pd 
 import os
-import time
-import requests
 import re
 import json
+import argparse
+from collections import deque
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS, stage
+from common.record_ids import RECORD_COLUMNS, RECORD_ID, ensure_ids, record_id, record_key
+from common.table_io import TableWriter, iter_table, read_table, table_exists
+from checkpoint_journal import COMPACT_CHUNK, CheckpointJournal
+from evidence_window import WINDOW_CHARS, evidence_window
+from local_classifier import DEFAULT_THRESHOLDS, confident, format_report, parse_thresholds, train_from_records
+from near_duplicates import THRESHOLD as DEDUP_THRESHOLD, cluster
+from llm_client import RateLimiter, UsageCounter, get_session, post_chat
+from response_cache import ResponseCache, make_key, prompt_version
 
 os.environ["PYTHONIOENCODING"] = "utf-8"
 
 INPUT_CSV = "placename_records_resolved.csv"
 PROGRESS_FILE = "batch_classification_results.csv"
+JOURNAL_FILE = "batch_classification_results.jsonl"
+JOURNAL_FSYNC_EVERY = 20
 API_KEY = ""
 API_URL = ""
 SELECTED_MODEL = 'deepseek-ai/DeepSeek-V3' 
+CONCURRENCY = 8
+RPM_LIMIT = 300
+TPM_LIMIT = 300000
+MAX_RETRIES = 4
+BATCH_SIZE = 1
+TEMPERATURE = 0
+# 每条记录送入 LLM 的文本字数预算，超出时由 evidence_window 选取相关子句
+PROMPT_BUDGET = WINDOW_CHARS
+CACHE_DB = "llm_response_cache.sqlite"
+CACHE_MAX_ENTRIES = 500000
+CACHE_MAX_AGE_DAYS = 180
+# 正则与 LLM 之间的本地模型层：默认关闭，--local-tier 开启
+LOCAL_TIER = False
+LOCAL_THRESHOLDS = DEFAULT_THRESHOLDS
+# 近重复记录只请求一次、结果分发给同簇其余记录：默认关闭，--dedup 开启
+DEDUP = False
 
 STRONG_PATTERNS = [r"因.*?名之", r"因.*?為名", r"因.*?故名", r"以.*?為名", r"取.*?之義", r"取.*?名之", r"故名", r"故曰", r"改曰"]
 
@@ -58,81 +90,430 @@ SYSTEM_PROMPT = """你是一名历史地名学研究中的文本标注助手。
 }
 """
 
+BATCH_SYSTEM_PROMPT = SYSTEM_PROMPT[:SYSTEM_PROMPT.index("仅返回 JSON")] + """下面给出多条记录，每条以【编号】开头，请逐条独立判断。
+
+仅返回 JSON 数组，每条记录对应一个元素，不得遗漏或合并：
+[
+  {"id": 记录编号, "label": "STRONG | WEAK | NONE", "evidence": "直接支持该判断的原文片段"}
+]
+"""
+
+LABELS = {"STRONG", "WEAK", "NONE"}
+RESULT_COLUMNS = ["resolution_type", "evidence", "label_source", "cluster_id"]
+EXPORT_COLUMNS = [RECORD_ID, "placename", "text", "source", "evidence"]
+
+def compile_strong_patterns(patterns):
+    """
+    把全部 STRONG 规则编译成一个按行锚定的多分支正则，命名分组 r{i} 对应第 i 条规则。
+    对 “X.*?Y” 型规则只从每行第一个 X 起尝试：若它之后没有 Y，后面的 X 也不会有，
+    从而避免惰性匹配在长文本上逐位置回溯。
+    """
+    branches = []
+    for i, pat in enumerate(patterns):
+        head = pat.split(".*?")[0]
+        if ".*?" in pat and len(head) == 1:
+            branches.append(rf"^[^{head}\n]*(?P<r{i}>{pat})")
+        else:
+            branches.append(rf"^.*?(?P<r{i}>{pat})")
+    return re.compile("|".join(branches), re.MULTILINE)
+
+STRONG_REGEX = compile_strong_patterns(STRONG_PATTERNS)
+
+def match_strong(text):
+    """返回 (命中规则, 证据起点, 证据终点)，未命中返回 None。"""
+    m = STRONG_REGEX.search(text)
+    if not m:
+        return None
+    return STRONG_PATTERNS[int(m.lastgroup[1:])], m.start(m.lastgroup), m.end(m.lastgroup)
+
 def check_strong_by_regex(text):
-    for pat in STRONG_PATTERNS:
-        if re.search(pat, text): return True
-    return False
+    return STRONG_REGEX.search(text) is not None
+
+def strong_prepass(texts):
+    """
+    对整列文本做一次向量化正则预筛，返回与 texts 同索引的 DataFrame：
+    strong_rule 为命中的规则（未命中为空串），strong_evidence 为命中的原文片段。
+    """
+    hits = texts.astype(str).str.extract(STRONG_REGEX)
+    fired = hits.notna().to_numpy()
+    matched = fired.any(axis=1)
+    rules = [STRONG_PATTERNS[int(hits.columns[j][1:])] for j in fired.argmax(axis=1)]
+    return pd.DataFrame({
+        "strong_rule": [r if ok else "" for r, ok in zip(rules, matched)],
+        "strong_evidence": hits.bfill(axis=1).iloc[:, 0].fillna(""),
+    }, index=texts.index)
+
+def parse_label_json(content):
+    clean_json = re.search(r'\{.*\}', content, re.DOTALL)
+    if not clean_json:
+        return None
+    try:
+        res = json.loads(clean_json.group())
+    except ValueError:
+        return None
+    return res.get('label', 'NONE'), res.get('evidence', '')
+
+def build_record_message(placename, text):
+    return f"地名：【{placename}】\n文本：{evidence_window(text, placename, PROMPT_BUDGET)}"
+
+def call_api_single(placename, text, limiter=None, cache=None, usage=None):
+    user_msg = build_record_message(placename, text)
+    if cache:
+        cache_key = make_key(SELECTED_MODEL, SYSTEM_PROMPT, user_msg, TEMPERATURE)
+        cached = cache.get(cache_key)
+        if cached:
+            return cached
 
-def call_api_single(placename, text):
     payload = {
         "model": SELECTED_MODEL,
         "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
-            {"role": "user", "content": f"地名：【{placename}】\n文本：{text[:120]}"}
+            {"role": "user", "content": user_msg}
         ],
-        "temperature": 0
+        "temperature": TEMPERATURE
     }
     headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
-    
-    for attempt in range(2):
+    limiter = limiter or RateLimiter(RPM_LIMIT, TPM_LIMIT)
+    # 中文约 1 字 1 token，另加输出预算
+    est_tokens = len(SYSTEM_PROMPT) + len(user_msg) + 64
+
+    result = post_chat(get_session(CONCURRENCY), API_URL, payload, headers, limiter,
+                       est_tokens, MAX_RETRIES, parse_label_json, usage=usage)
+    if not result:
+        return "ERROR", "API_FAILED"
+    if cache:
+        cache.put(cache_key, SELECTED_MODEL, prompt_version(SYSTEM_PROMPT), result[0], result[1])
+    return result
+
+def parse_batch_json(content, expected_ids):
+    """解析批量结果，仅保留编号合法、标签合法的条目；格式错误时返回空字典。"""
+    clean_json = re.search(r'\[.*\]', content, re.DOTALL)
+    if not clean_json:
+        return {}
+    try:
+        items = json.loads(clean_json.group())
+    except ValueError:
+        return {}
+    if not isinstance(items, list):
+        return {}
+
+    parsed = {}
+    for item in items:
+        if not isinstance(item, dict):
+            continue
         try:
-            response = requests.post(API_URL, json=payload, headers=headers, timeout=30)
-            if response.status_code != 200:
-                time.sleep(2)
-                continue
-            
-            content = response.json()['choices'][0]['message']['content']
-            clean_json = re.search(r'\{.*\}', content, re.DOTALL)
-            if clean_json:
-                res = json.loads(clean_json.group())
-                return res.get('label', 'NONE'), res.get('evidence', '')
-        except:
-            time.sleep(1)
-    return "ERROR", "API_FAILED"
-
-def main():
-    if not os.path.exists(INPUT_CSV): return
-    df = pd.read_csv(INPUT_CSV, encoding='utf-8-sig').fillna("")
-    
-    if os.path.exists(PROGRESS_FILE):
-        processed_df = pd.read_csv(PROGRESS_FILE, encoding='utf-8-sig')
-        processed_keys = set(processed_df['placename'] + processed_df['text'].str[:10])
-        results = processed_df.to_dict('records')
-    else:
-        processed_keys = set()
-        results = []
-
-    print(f"已加载进度：{len(processed_keys)} 条。剩余待处理：{len(df)-len(processed_keys)} 条。")
-
-    for idx, row in df.iterrows():
-        key = row['placename'] + row['text'][:10]
-        if key in processed_keys:
+            rid = int(item.get('id'))
+        except (TypeError, ValueError):
             continue
+        label = str(item.get('label', '')).strip().upper()
+        evidence = item.get('evidence', '')
+        if rid in expected_ids and rid not in parsed and label in LABELS and isinstance(evidence, str):
+            parsed[rid] = (label, evidence)
+    return parsed
 
-        placename = row['placename']
-        text = row['text']
-        
-        if check_strong_by_regex(text):
-            label, evidence, mode = "STRONG", "Regex Match", "[REGEX]"
-        else:
-            label, evidence = call_api_single(placename, text)
-            mode = "[LLM  ]"
-            time.sleep(0.6) 
-
-        print(f"[{idx+1}/{len(df)}] {mode} {placename} -> {label}")
-        
-        res_row = row.to_dict()
-        res_row.update({"resolution_type": label, "evidence": evidence})
-        results.append(res_row)
-
-        if (idx + 1) % 5 == 0:
-            pd.DataFrame(results).to_csv(PROGRESS_FILE, index=False, encoding='utf-8-sig')
-
-    full_df = pd.DataFrame(results)
-    for l in ["STRONG", "WEAK", "NONE"]:
-        full_df[full_df["resolution_type"] == l][["placename", "text", "source", "evidence"]].to_csv(f"extracted_{l}.csv", index=False, encoding='utf-8-sig')
+def call_api_batch(items, limiter=None, cache=None, usage=None):
+    """
+    把多条 (地名, 文本) 打包进一次请求，返回与 items 等长的 (label, evidence) 列表。
+    批量结果缺失或格式错误的记录单独重新请求。
+    """
+    results = [None] * len(items)
+    messages = [build_record_message(p, t) for p, t in items]
+    keys = [make_key(SELECTED_MODEL, BATCH_SYSTEM_PROMPT, m, TEMPERATURE) for m in messages]
+    if cache:
+        for i, key in enumerate(keys):
+            results[i] = cache.get(key)
+
+    todo = [i for i, r in enumerate(results) if r is None]
+    if len(todo) > 1:
+        user_msg = "\n\n".join(f"【{i}】{messages[i]}" for i in todo)
+        payload = {
+            "model": SELECTED_MODEL,
+            "messages": [
+                {"role": "system", "content": BATCH_SYSTEM_PROMPT},
+                {"role": "user", "content": user_msg}
+            ],
+            "temperature": TEMPERATURE
+        }
+        headers = {"Authorization": f"Bearer {API_KEY}", "Content-Type": "application/json"}
+        limiter = limiter or RateLimiter(RPM_LIMIT, TPM_LIMIT)
+        est_tokens = len(BATCH_SYSTEM_PROMPT) + len(user_msg) + 64 * len(todo)
+        expected = set(todo)
+        parsed = post_chat(get_session(CONCURRENCY), API_URL, payload, headers, limiter, est_tokens,
+                           MAX_RETRIES, lambda c: parse_batch_json(c, expected), usage=usage) or {}
+        for i, (label, evidence) in parsed.items():
+            results[i] = (label, evidence)
+            if cache:
+                cache.put(keys[i], SELECTED_MODEL, prompt_version(BATCH_SYSTEM_PROMPT), label, evidence)
+
+    for i, r in enumerate(results):
+        if r is None:
+            results[i] = call_api_single(items[i][0], items[i][1], limiter, cache, usage)
+    return results
+
+def classify_chunk(items, limiter, cache, usage):
+    if len(items) == 1:
+        return [call_api_single(items[0][0], items[0][1], limiter, cache, usage)]
+    return call_api_batch(items, limiter, cache, usage)
+
+def classify_rows(rows, concurrency, limiter, cache=None, batch_size=BATCH_SIZE, usage=None, strong_hits=None,
+                  local_hits=None, followers=None):
+    """
+    正则优先、LLM 兜底的分类流水线。LLM 记录按 batch_size 条打包，在线程池中并发执行，
+    但结果严格按输入顺序产出，保证断点续跑的进度文件有序。
+    strong_hits 为 strong_prepass 预先算好的 {idx: 证据}；缺省时逐条匹配。
+    local_hits 为 local_prepass 给出的 {idx: 标签}，这些记录不再请求 LLM。
+    followers 为 dedup_prepass 给出的 {idx: 代表 idx}，这些记录直接沿用代表的 LLM 结果；
+    代表总在成员之前出现，成员入队时代表所在批次已知。
+    """
+    batch_size = max(1, batch_size)
+    window = max(1, concurrency) * batch_size * 2
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        pending = deque()
+        batch, holder = [], {}
+        rep_slots = {}
+        rep_ids = set(followers.values()) if followers else ()
+
+        def submit_batch():
+            nonlocal batch, holder
+            if batch:
+                holder['future'] = pool.submit(classify_chunk, batch, limiter, cache, usage)
+                batch, holder = [], {}
+
+        def ready(entry):
+            return entry[4] or ('future' in entry[2] and entry[2]['future'].done())
+
+        def pop():
+            idx, row, slot, pos, done, mode = pending.popleft()
+            if done:
+                return (idx, row) + done
+            if 'future' not in slot:
+                submit_batch()
+            label, evidence = slot['future'].result()[pos]
+            return idx, row, label, evidence, mode
+
+        for idx, row in rows:
+            if strong_hits is not None:
+                evidence = strong_hits.get(idx)
+            else:
+                hit = match_strong(row['text'])
+                evidence = row['text'][hit[1]:hit[2]] if hit else None
+            if evidence:
+                pending.append((idx, row, None, None, ("STRONG", evidence, "[REGEX]"), None))
+            elif local_hits and idx in local_hits:
+                pending.append((idx, row, None, None, (local_hits[idx], "", "[LOCAL]"), None))
+            elif followers and idx in followers:
+                pending.append((idx, row) + rep_slots[followers[idx]] + (None, "[DUP  ]"))
+            else:
+                if idx in rep_ids:
+                    rep_slots[idx] = (holder, len(batch))
+                pending.append((idx, row, holder, len(batch), None, "[LLM  ]"))
+                batch.append((row['placename'], row['text']))
+                if len(batch) >= batch_size:
+                    submit_batch()
+
+            while pending and (len(pending) > window or ready(pending[0])):
+                yield pop()
+
+        while pending:
+            yield pop()
+
+def train_local_tier(records, thresholds):
+    """用日志中已有的 LLM 标注训练本地模型，并报告留出集上与 LLM 的一致率；标注不足时返回 None。"""
+    model, report = train_from_records(records, record_key, thresholds, check_strong_by_regex, PROMPT_BUDGET)
+    if model is None:
+        print("本地模型：可用的 LLM 标注不足，本次跳过。")
+        return None
+    print(format_report(report))
+    METRICS.set("local_holdout_coverage", report["coverage"])
+    if report["precision"] is not None:
+        METRICS.set("local_holdout_precision", report["precision"])
+    return model
+
+def local_prepass(model, pending, strong_hits, thresholds):
+    """对正则未命中的待处理记录给出达到阈值的标签，返回 ({idx: 标签}, 候选条数)。"""
+    candidates = pending.drop(index=list(strong_hits))
+    labels, confidences = model.predict(candidates['text'].astype(str).tolist(),
+                                        candidates['placename'].astype(str).tolist())
+    taken = confident(labels, confidences, thresholds)
+    return {idx: label for idx, label, ok in zip(candidates.index, labels, taken) if ok}, len(candidates)
+
+def dedup_prepass(pending, strong_hits, local_hits, threshold):
+    """
+    对仍需 LLM 判定的记录按发给 LLM 的消息做 MinHash/LSH 近重复聚类（限同一地名），
+    返回 ({成员 idx: 代表 idx}, {idx: 簇 ID})，并报告省去的 LLM 判定条数。
+    """
+    candidates = pending.drop(index=list(strong_hits) + list(local_hits))
+    placenames = candidates['placename'].astype(str).tolist()
+    messages = [build_record_message(p, t) for p, t in zip(placenames, candidates['text'].astype(str))]
+    followers, cluster_ids = cluster(list(candidates.index), placenames, messages, threshold)
+    n_clusters = len(cluster_ids) - len(followers)
+    print(f"近重复聚类：{n_clusters} 个簇覆盖 {len(cluster_ids)} 条记录，"
+          f"省去 {len(followers)} 条 LLM 判定（占 {len(followers) / max(1, len(candidates)):.1%}）。")
+    return followers, cluster_ids
+
+def input_chunks(chunksize=None):
+    """整表读取，或按 chunksize 行分块读取（行号在各块间连续）。"""
+    if not chunksize:
+        yield read_table(INPUT_CSV)
+        return
+    offset = 0
+    for chunk in iter_table(INPUT_CSV, chunksize):
+        chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+        offset += len(chunk)
+        yield chunk
+
+def content_keys(chunksize=None):
+    """输入表逐条给出 (按当前 地名/文本/出处 现算的键, record_id)，供旧版进度对照迁移。"""
+    for chunk in input_chunks(chunksize or COMPACT_CHUNK):
+        df = ensure_ids(chunk.fillna(""))
+        for rid, p, t, s in zip(df[RECORD_ID], df['placename'].astype(str), df['text'].astype(str),
+                                df['source'].astype(str)):
+            yield record_id(p, t, s), rid
+
+def main(concurrency=CONCURRENCY, rpm=RPM_LIMIT, tpm=TPM_LIMIT, use_cache=True, batch_size=BATCH_SIZE,
+         local_tier=LOCAL_TIER, local_thresholds=None, dedup=DEDUP, dedup_threshold=DEDUP_THRESHOLD,
+         chunksize=None):
+    """
+    chunksize 为空时整表读入；给定时按块流式处理：内存中只有当前块与在途记录，
+    结果逐条追加到日志，最后按块压实，峰值内存与输入规模无关
+    （仅已处理 ID 的摘要数组按每条 16 字节增长，本次新增的每块并入一次；开启本地模型层时训练集另计）。
+    近重复聚类在流式模式下限于块内。
+    """
+    if not table_exists(INPUT_CSV): return
+    start = time.perf_counter()
+    thresholds = local_thresholds or LOCAL_THRESHOLDS
+
+    journal = CheckpointJournal(JOURNAL_FILE, record_key, JOURNAL_FSYNC_EVERY).load()
+    journal.seed_from_csv(PROGRESS_FILE)
+    if journal.legacy:
+        legacy = journal.legacy
+        print(f"旧版进度 {legacy} 条，其中 {journal.adopt_ids(content_keys(chunksize))} 条已按内容对应到输入表的 record_id。")
+    if chunksize:
+        print(f"已加载进度：{len(journal)} 条。按每块 {chunksize} 行流式处理。")
+
+    model = train_local_tier(journal.iter_records(), thresholds) if local_tier else None
+
+    limiter = RateLimiter(rpm, tpm)
+    cache = ResponseCache(CACHE_DB, CACHE_MAX_ENTRIES, CACHE_MAX_AGE_DAYS) if use_cache else None
+    usage = UsageCounter()
+    llm_records = 0
+    classified = 0
+    rule_counts = pd.Series(0, index=STRONG_PATTERNS)
+    prepass_total = local_total = local_candidates = 0
+    dedup_clusters = dedup_saved = 0
+    columns = None
+    # 当前输入的 ID 摘要（每条 16 字节），压实时据此剔除已不在输入中的旧记录
+    input_ids = bytearray()
+    try:
+        for n, chunk in enumerate(input_chunks(chunksize), 1):
+            df = ensure_ids(chunk.fillna(""))
+            if columns is None:
+                columns = list(df.columns) + [c for c in RESULT_COLUMNS if c not in df.columns]
+            input_ids += b"".join(bytes.fromhex(i) for i in df[RECORD_ID])
+            pending = df[~journal.contains_many(df[RECORD_ID])]
+            progress = "" if chunksize else f"/{len(df)}"
+            if chunksize:
+                print(f"[块 {n}] 剩余待处理：{len(pending)} 条。")
+            else:
+                print(f"已加载进度：{len(journal)} 条。剩余待处理：{len(pending)} 条。")
+            if pending.empty:
+                continue
+
+            prepass = strong_prepass(pending['text'])
+            regex_hits = prepass[prepass['strong_rule'] != ""]
+            strong_hits = regex_hits['strong_evidence'].to_dict()
+            print(f"正则预筛命中 {len(strong_hits)} 条，剩余 {len(prepass) - len(strong_hits)} 条需 LLM 判定。")
+            rule_counts = rule_counts.add(regex_hits['strong_rule'].value_counts(), fill_value=0)
+            prepass_total += len(prepass)
+
+            local_hits = {}
+            if model is not None:
+                local_hits, n_candidates = local_prepass(model, pending, strong_hits, thresholds)
+                local_total += len(local_hits)
+                local_candidates += n_candidates
+
+            followers, cluster_ids = {}, {}
+            if dedup:
+                followers, cluster_ids = dedup_prepass(pending, strong_hits, local_hits, dedup_threshold)
+                dedup_clusters += len(cluster_ids) - len(followers)
+                dedup_saved += len(followers)
+
+            # 逐行取字典，避免 iterrows 为每行构造 Series
+            rows = zip(pending.index, pending.to_dict('records'))
+            for idx, row, label, evidence, mode in classify_rows(rows, concurrency, limiter, cache, batch_size, usage, strong_hits, local_hits, followers):
+                print(f"[{idx+1}{progress}] {mode} {row['placename']} -> {label}")
+                if mode == "[LLM  ]":
+                    llm_records += 1
+                classified += 1
+                METRICS.inc("records_classified_total", mode=mode.strip("[] "), label=label)
+                METRICS.checkpoint()
+
+                res_row = dict(row)
+                res_row.update({"resolution_type": label, "evidence": evidence, "label_source": mode.strip("[] ").lower(),
+                                "cluster_id": cluster_ids.get(idx, "")})
+                journal.append(res_row)
+    finally:
+        journal.close()
+        for rule, n in rule_counts[rule_counts > 0].sort_values(ascending=False, kind="stable").items():
+            print(f"  {rule}: {int(n)}")
+        METRICS.set("regex_prepass_records", prepass_total)
+        for rule in STRONG_PATTERNS:
+            n = int(rule_counts[rule])
+            METRICS.set("regex_hits", n, pattern=rule)
+            METRICS.set("regex_hit_rate", round(n / prepass_total, 6) if prepass_total else 0.0, pattern=rule)
+        if model is not None:
+            share = local_total / local_candidates if local_candidates else 0.0
+            print(f"本地模型直接判定 {local_total} 条，占需 LLM 判定记录的 {share:.1%}（省去的 API 调用）。")
+            METRICS.set("local_calls_avoided_share", round(share, 6))
+        if dedup:
+            METRICS.set("dedup_clusters", dedup_clusters)
+            METRICS.set("dedup_calls_saved", dedup_saved)
+        if llm_records:
+            print(f"LLM 请求 {usage.requests} 次，共 {usage.total_tokens} token，"
+                  f"平均每条记录 {usage.total_tokens / llm_records:.1f} token（{llm_records} 条）。")
+        if cache:
+            print(f"LLM 缓存命中 {cache.hits} 次，未命中 {cache.misses} 次；淘汰 {cache.evict()} 条。")
+            METRICS.set("llm_cache_lookups", cache.hits, result="hit")
+            METRICS.set("llm_cache_lookups", cache.misses, result="miss")
+            cache.close()
+        METRICS.throughput("classify", time.perf_counter() - start, records=classified)
+
+    # 结果表与各类别导出按块写出，不把全部结果读回内存
+    exports = {l: TableWriter(f"extracted_{l}.csv", fmt="csv") for l in ["STRONG", "WEAK", "NONE"]}
+    for writer in exports.values():
+        writer.write(pd.DataFrame(columns=EXPORT_COLUMNS))
+
+    def export(part):
+        for l, writer in exports.items():
+            rows = part[part["resolution_type"] == l]
+            if len(rows):
+                writer.write(rows[EXPORT_COLUMNS])
+
+    journal.compact(PROGRESS_FILE, columns or RECORD_COLUMNS + RESULT_COLUMNS, chunksize or COMPACT_CHUNK,
+                    on_chunk=export, keep=input_ids)
+    if journal.stale:
+        print(f"日志中 {journal.stale} 条记录已不在当前输入中，未写入结果表。")
+    for writer in exports.values():
+        writer.close()
     
     print("全部任务处理完毕。")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="正则优先、LLM 兜底的地名命名解释分类")
+    parser.add_argument("--concurrency", type=int, default=CONCURRENCY, help="并发 LLM 请求数，1 为串行")
+    parser.add_argument("--rpm", type=int, default=RPM_LIMIT, help="每分钟请求数上限，0 为不限")
+    parser.add_argument("--tpm", type=int, default=TPM_LIMIT, help="每分钟 token 数上限，0 为不限")
+    parser.add_argument("--no-cache", action="store_true", help="不读写本地 LLM 结果缓存")
+    parser.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="每次请求打包的记录数，1 为逐条请求")
+    parser.add_argument("--local-tier", action="store_true", help="在正则与 LLM 之间启用本地 n-gram 逻辑回归层")
+    parser.add_argument("--local-threshold", default="", help="本地层置信度阈值，如 NONE=0.95,WEAK=0.99")
+    parser.add_argument("--prompt-budget", type=int, default=PROMPT_BUDGET, help="每条记录送入 LLM 的最多字数")
+    parser.add_argument("--dedup", action="store_true", help="近重复记录只请求一次 LLM，结果分发给同簇记录")
+    parser.add_argument("--dedup-threshold", type=float, default=DEDUP_THRESHOLD, help="并入同簇的最低估计相似度")
+    parser.add_argument("--chunksize", type=int, default=None, help="按块流式读取输入的行数，缺省为整表读入")
+    args = parser.parse_args()
+    PROMPT_BUDGET = args.prompt_budget
+    with stage("classify"):
+        main(args.concurrency, args.rpm, args.tpm, not args.no_cache, args.batch_size,
+             args.local_tier, parse_thresholds(args.local_threshold), args.dedup, args.dedup_threshold,
+             args.chunksize)
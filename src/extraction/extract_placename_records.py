@@ -1,6 +1,20 @@
 import os
 import re
 import csv
+import sys
+import json
+import time
+import hashlib
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS, stage
+from common.record_ids import RECORD_COLUMNS, record_id
+from common.table_io import table_path, write_table
 
 INPUT_DIR = ""
 OUTPUT_CSV = "placename..........................................................................................................................>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>>_records.csv"
@@ -11,23 +25,58 @@ PREFIX_VERBS = ["置", "改", "分", "析", "移", "隸", "屬", "并", "於", "
 STOP_START_WORDS = ["在", "及", "与", "与", "之", "其", "此", "旧", "从", "至", "界", "有", "谓"]
 PLACE_SUFFIXES = ["縣", "州", "郡", "府", "道", "山", "水", "河", "川", "原", "谷", "城", "關", "津", "坡", "陵", "宮", "溪", "岩", "潭"]
 
+DIRECTION_WORDS = ["南", "北", "西", "东", "治", "界"]
+STRIP_CHARS = " ；，。"
+LEADING_NUMBER = re.compile(r"^\d+\s*")
+NAME_BOUNDARY = re.compile(r"^[，。；\s]")
+
+def build_prefix_table(words):
+    """首字 -> [(原列表序号, 词)]，供单趟前缀剥离按原列表顺序查表。"""
+    table = {}
+    for i, w in enumerate(words):
+        table.setdefault(w[0], []).append((i, w))
+    return table
+
+DYNASTY_TABLE = build_prefix_table(DYNASTIES)
+VERB_TABLE = build_prefix_table(PREFIX_VERBS)
+SUFFIX_RANK = {s: i for i, s in enumerate(PLACE_SUFFIXES)}
+STOP_START_SET = set(STOP_START_WORDS)
+DIRECTION_SET = set(DIRECTION_WORDS)
+
+def strip_listed(line, table):
+    """等价于按列表顺序逐个 startswith 剥离，但只查当前首字对应的候选词。"""
+    next_rank = 0
+    while line:
+        for rank, word in table.get(line[0], ()):
+            if rank >= next_rank and line.startswith(word):
+                line = line[len(word):].lstrip(STRIP_CHARS)
+                next_rank = rank + 1
+                break
+        else:
+            break
+    return line
+
+def is_cjk(ch):
+    return "一" <= ch <= "龥"
+
+def strip_admin(line):
+    # 等价于依次 re.match(rf"^[一-龥]{{1,2}}{a}")，贪婪匹配先试两字
+    for a in ADMIN_LEVELS:
+        if len(line) >= 3 and line[2] == a and is_cjk(line[0]) and is_cjk(line[1]):
+            line = line[3:].lstrip(STRIP_CHARS)
+        elif len(line) >= 2 and line[1] == a and is_cjk(line[0]):
+            line = line[2:].lstrip(STRIP_CHARS)
+    return line
+
 def clean_line_start(line):
-    line = re.sub(r"^\d+\s*", "", line).strip()
+    line = LEADING_NUMBER.sub("", line).strip()
     
     changed = True
     while changed:
         original = line
-        for d in DYNASTIES:
-            if line.startswith(d):
-                line = line[len(d):].lstrip(" ；，。")
-        for a in ADMIN_LEVELS:
-            match = re.match(rf"^[一-龥]{{1,2}}{a}", line)
-            if match:
-                line = line[len(match.group(0)):].lstrip(" ；，。")
-        for v in PREFIX_VERBS:
-            if line.startswith(v):
-                line = line[len(v):].lstrip(" ；，。")
-        
+        line = strip_listed(line, DYNASTY_TABLE)
+        line = strip_admin(line)
+        line = strip_listed(line, VERB_TABLE)
         changed = (original != line)
     return line
 
@@ -35,61 +84,122 @@ def extract_valid_placename(line):
     cleaned_start = clean_line_start(line)
     if not cleaned_start: return None
 
-    for suffix in PLACE_SUFFIXES:
-        if suffix in cleaned_start:
-            idx = cleaned_start.find(suffix)
-            potential_name = cleaned_start[:idx+1]
-            
-            if not (2 <= len(potential_name) <= 3):
-                continue
+    # 地名限 2-3 字，故只有首次出现在第 1、2 位的后缀可能成立；按 PLACE_SUFFIXES 顺序尝试
+    candidates = []
+    for idx in (1, 2):
+        if idx < len(cleaned_start):
+            ch = cleaned_start[idx]
+            if ch in SUFFIX_RANK and ch not in cleaned_start[:idx]:
+                candidates.append((SUFFIX_RANK[ch], idx))
+
+    for _, idx in sorted(candidates):
+        potential_name = cleaned_start[:idx+1]
+
+        if potential_name[0] in STOP_START_SET:
+            continue
 
-            if any(potential_name.startswith(w) for w in STOP_START_WORDS):
+        after_name = cleaned_start[idx+1:]
+        if after_name and not NAME_BOUNDARY.match(after_name):
+            if after_name[0] in DIRECTION_SET:
                 continue
+        
+        return potential_name
+    return None
 
-            after_name = cleaned_start[idx+1:]
-            if after_name and not re.match(r"^[，。；\s]", after_name):
-                if any(after_name.startswith(dir_word) for dir_word in ["南", "北", "西", "东", "治", "界"]):
-                    continue
+def extract_file(input_dir, fname):
+    """单个文件内的地名聚合；文件之间互不共享状态，可安全并行。"""
+    aggregated_data = {}
+    last_place = None
+    path = os.path.join(input_dir, fname)
+    
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line: continue
             
-            return potential_name
-    return None
+            p_name = extract_valid_placename(line)
+            
+            if p_name:
+                last_place = p_name
+                content_start_idx = line.find(p_name) + len(p_name)
+                content = line[content_start_idx:].lstrip("，。； ")
+                
+                key = (last_place, fname)
+                if key not in aggregated_data: aggregated_data[key] = []
+                if content: aggregated_data[key].append(content)
+            elif last_place:
+                aggregated_data[(last_place, fname)].append(line)
+    return list(aggregated_data.items())
+
+with open(__file__, "rb") as _src:
+    CODE_VERSION = hashlib.sha256(_src.read()).hexdigest()[:16]
+
+def extract_file_cached(input_dir, cache_dir, fname):
+    """按 (文件名, 文件内容, 本脚本版本) 缓存单文件聚合结果，未变化的卷无需重新解析。"""
+    h = hashlib.sha256(f"{CODE_VERSION}\0{fname}\0".encode("utf-8"))
+    with open(os.path.join(input_dir, fname), "rb") as f:
+        h.update(f.read())
+    cache_path = os.path.join(cache_dir, h.hexdigest() + ".json")
 
-def main():
+    if os.path.exists(cache_path):
+        with open(cache_path, "r", encoding="utf-8") as f:
+            return [(tuple(key), texts) for key, texts in json.load(f)]
+
+    items = extract_file(input_dir, fname)
+    tmp_path = f"{cache_path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(items, f, ensure_ascii=False)
+    os.replace(tmp_path, cache_path)
+    return items
+
+def main(input_dir=INPUT_DIR, output_csv=OUTPUT_CSV, workers=1, cache_dir=None):
     aggregated_data = {} 
-    files = sorted([f for f in os.listdir(INPUT_DIR) if f.endswith(".txt")], 
+    files = sorted([f for f in os.listdir(input_dir) if f.endswith(".txt")], 
                    key=lambda x: int(x.replace(".txt", "")) if x.replace(".txt", "").isdigit() else x)
 
-    for fname in files:
-        last_place = None
-        path = os.path.join(INPUT_DIR, fname)
-        
-        with open(path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line: continue
-                
-                p_name = extract_valid_placename(line)
-                
-                if p_name:
-                    last_place = p_name
-                    content_start_idx = line.find(p_name) + len(p_name)
-                    content = line[content_start_idx:].lstrip("，。； ")
-                    
-                    key = (last_place, fname)
-                    if key not in aggregated_data: aggregated_data[key] = []
-                    if content: aggregated_data[key].append(content)
-                elif last_place:
-                    aggregated_data[(last_place, fname)].append(line)
-
-    with open(OUTPUT_CSV, "w", encoding="utf-8-sig", newline="") as f:
-        writer = csv.writer(f)
-        writer.writerow(["placename", "text", "source"])
+    if cache_dir:
+        os.makedirs(cache_dir, exist_ok=True)
+        extract = partial(extract_file_cached, input_dir, cache_dir)
+    else:
+        extract = partial(extract_file, input_dir)
+    start = time.perf_counter()
+    # 归入各地名条目的文本片段数，不等于输入行数
+    fragments = 0
+    if workers > 1:
+        # map 按提交顺序返回，合并顺序与串行一致，输出逐字节相同
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            per_file = pool.map(extract, files, chunksize=max(1, len(files) // (workers * 4)))
+            for items in per_file:
+                aggregated_data.update(items)
+                fragments += sum(len(texts) for _, texts in items)
+    else:
+        for fname in files:
+            items = extract(fname)
+            aggregated_data.update(items)
+            fragments += sum(len(texts) for _, texts in items)
+
+    def records():
         for (name, src), texts in aggregated_data.items():
             combined_text = " ".join(dict.fromkeys(texts))
             combined_text = re.sub(r"\b\d{2,4}\b", "", combined_text).strip()
-            writer.writerow([name, combined_text, src])
+            yield [record_id(name, combined_text, src), name, combined_text, src]
+
+    if table_path(output_csv).endswith(".csv"):
+        with open(output_csv, "w", encoding="utf-8-sig", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(RECORD_COLUMNS)
+            writer.writerows(records())
+    else:
+        write_table(pd.DataFrame(list(records()), columns=RECORD_COLUMNS), output_csv)
+    METRICS.throughput("extract", time.perf_counter() - start,
+                       volumes=len(files), fragments=fragments, records=len(aggregated_data))
             
     print(f"提取完成。通过前缀剥离与黑名单过滤，已大幅减少误判。")
 
 if __name__ == "__main__":
-    main()
+    parser = argparse.ArgumentParser(description="从清洗后的文本中识别地名条目并聚合上下文")
+    parser.add_argument("--workers", type=int, default=1, help="并行处理文件的进程数")
+    parser.add_argument("--cache-dir", default=None, help="单文件聚合结果缓存目录，未变化的文件直接复用")
+    args = parser.parse_args()
+    with stage("extract"):
+        main(workers=args.workers, cache_dir=args.cache_dir)
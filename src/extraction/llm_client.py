@@ -0,0 +1,141 @@
+import random
+import threading
+import time
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from common.metrics import METRICS
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+_session = None
+_session_lock = threading.Lock()
+
+
+class TokenBucket:
+    """按分钟速率匀速补充的令牌桶，acquire 在令牌不足时阻塞等待。"""
+
+    def __init__(self, per_minute, capacity=None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, amount=1):
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) / self.rate
+            time.sleep(wait)
+
+
+class RateLimiter:
+    """同时约束每分钟请求数 (RPM) 与每分钟 token 数 (TPM)。"""
+
+    def __init__(self, rpm, tpm):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+
+    def acquire(self, est_tokens):
+        if self.requests:
+            self.requests.acquire(1)
+        if self.tokens:
+            self.tokens.acquire(est_tokens)
+
+
+class UsageCounter:
+    """累计接口返回的 usage 字段，用于统计每条记录的 token 成本。"""
+
+    def __init__(self):
+        self.requests = 0
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+        self.lock = threading.Lock()
+
+    def add(self, usage):
+        with self.lock:
+            self.requests += 1
+            if "prompt_tokens" in usage or "completion_tokens" in usage:
+                prompt = usage.get("prompt_tokens", 0) or 0
+                completion = usage.get("completion_tokens", 0) or 0
+            else:
+                prompt, completion = usage.get("total_tokens", 0) or 0, 0
+            self.prompt_tokens += prompt
+            self.completion_tokens += completion
+        METRICS.inc("llm_tokens_total", prompt, kind="prompt")
+        METRICS.inc("llm_tokens_total", completion, kind="completion")
+
+    @property
+    def total_tokens(self):
+        return self.prompt_tokens + self.completion_tokens
+
+
+def get_session(pool_size):
+    """进程内共享的 keep-alive 连接池。"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            _session.mount("http://", adapter)
+            _session.mount("https://", adapter)
+        return _session
+
+
+def backoff_delay(attempt, base=1.0, cap=30.0, retry_after=None):
+    if retry_after:
+        try:
+            return min(cap, float(retry_after))
+        except ValueError:
+            pass
+    return min(cap, base * (2 ** attempt)) * (0.5 + random.random() / 2)
+
+
+def post_chat(session, url, payload, headers, limiter, est_tokens, max_retries, parse, timeout=30, usage=None):
+    """
+    发送 chat-completions 请求并用 parse(content) 解析结果。
+    429/5xx 与网络错误按指数退避重试；其余 4xx 直接放弃；parse 返回 None 视为格式错误并重试。
+    """
+    for attempt in range(max_retries):
+        if attempt:
+            METRICS.inc("llm_retries_total")
+        limiter.acquire(est_tokens)
+        start = time.perf_counter()
+        try:
+            response = session.post(url, json=payload, headers=headers, timeout=timeout)
+        except requests.RequestException:
+            METRICS.inc("llm_requests_total", status="network_error")
+            time.sleep(backoff_delay(attempt))
+            continue
+        METRICS.observe("llm_request_seconds", time.perf_counter() - start)
+        METRICS.inc("llm_requests_total", status=response.status_code)
+
+        if response.status_code in RETRY_STATUS:
+            time.sleep(backoff_delay(attempt, retry_after=response.headers.get("Retry-After")))
+            continue
+        if response.status_code != 200:
+            METRICS.inc("llm_failures_total", reason="status")
+            return None
+
+        try:
+            body = response.json()
+            content = body['choices'][0]['message']['content']
+        except (ValueError, KeyError, IndexError, TypeError):
+            METRICS.inc("llm_parse_errors_total")
+            continue
+        if usage is not None and isinstance(body.get('usage'), dict):
+            usage.add(body['usage'])
+        parsed = parse(content)
+        if parsed is not None:
+            return parsed
+        METRICS.inc("llm_parse_errors_total")
+    METRICS.inc("llm_failures_total", reason="retries_exhausted")
+    return None
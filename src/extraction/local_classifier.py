@@ -0,0 +1,186 @@
+import argparse
+import os
+import sys
+import zlib
+
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.table_io import read_table, table_exists
+from evidence_window import WINDOW_CHARS, evidence_window
+
+LABELS = ["STRONG", "WEAK", "NONE"]
+N_FEATURES = 1 << 18
+NGRAMS = (1, 2, 3)
+# 缺省与送入 LLM 的文本范围一致；分类阶段按 --prompt-budget 传入
+FEATURE_CHARS = WINDOW_CHARS
+EPOCHS = 40
+LEARNING_RATE = 0.05
+L2 = 1e-6
+HOLDOUT_EVERY = 5
+MIN_TRAIN_ROWS = 200
+# 只有置信度不低于阈值的预测才直接采用；>1 表示该类别从不由本地模型判定
+DEFAULT_THRESHOLDS = {"NONE": 0.95, "WEAK": 1.01, "STRONG": 1.01}
+
+
+def parse_thresholds(value):
+    """"NONE=0.95,WEAK=0.99" -> {"NONE": 0.95, "WEAK": 0.99, "STRONG": 1.01}"""
+    thresholds = dict(DEFAULT_THRESHOLDS)
+    for part in value.split(","):
+        if part.strip():
+            label, threshold = part.split("=")
+            thresholds[label.strip().upper()] = float(threshold)
+    return thresholds
+
+
+def featurize(texts, placenames=None, budget=FEATURE_CHARS):
+    """
+    字符 n-gram 哈希特征（二值、按行 L2 归一化），以扁平数组表示稀疏矩阵：
+    返回 (特征下标, 权重, 所属行号)。每行另含一个偏置特征 0，保证非空。
+    特征取自与 LLM 提示相同的证据窗口（同一地名与预算）。
+    """
+    placenames = placenames if placenames is not None else [""] * len(texts)
+    index, rows = [], []
+    for r, (text, placename) in enumerate(zip(texts, placenames)):
+        text = evidence_window(text, placename, budget)
+        feats = {0}
+        for n in NGRAMS:
+            for i in range(len(text) - n + 1):
+                feats.add(1 + zlib.crc32(text[i:i + n].encode("utf-8")) % (N_FEATURES - 1))
+        index.extend(feats)
+        rows.extend([r] * len(feats))
+    index = np.asarray(index, dtype=np.int64)
+    rows = np.asarray(rows, dtype=np.int64)
+    counts = np.bincount(rows, minlength=len(texts)).astype(np.float32)
+    values = (1.0 / np.sqrt(counts))[rows]
+    return index, values, rows
+
+
+class LocalClassifier:
+    """
+    numpy 实现的多类别逻辑回归（softmax），只用 CPU，训练与预测均为向量化的稀疏运算。
+    budget 为证据窗口字数，训练与预测使用同一值。
+    """
+
+    def __init__(self, budget=FEATURE_CHARS):
+        self.budget = budget
+        self.weights = np.zeros((N_FEATURES, len(LABELS)), dtype=np.float32)
+
+    def _logits(self, feats, n_rows):
+        index, values, rows = feats
+        return np.stack([np.bincount(rows, weights=self.weights[index, c] * values, minlength=n_rows)
+                         for c in range(len(LABELS))], axis=1)
+
+    def fit(self, texts, labels, placenames=None, epochs=EPOCHS, lr=LEARNING_RATE, l2=L2):
+        """全量梯度 + Adam；类别按频率反向加权，避免 NONE 一家独大。"""
+        feats = featurize(texts, placenames, self.budget)
+        index, values, rows = feats
+        y = np.asarray([LABELS.index(l) for l in labels])
+        n = len(y)
+        onehot = np.eye(len(LABELS), dtype=np.float32)[y]
+        class_weight = n / (len(LABELS) * np.maximum(np.bincount(y, minlength=len(LABELS)), 1))
+        sample_weight = class_weight[y][:, None] / n
+        m = np.zeros_like(self.weights)
+        v = np.zeros_like(self.weights)
+        for step in range(1, epochs + 1):
+            probs = softmax(self._logits(feats, n))
+            grad_rows = (probs - onehot) * sample_weight
+            grad = np.stack([np.bincount(index, weights=grad_rows[rows, c] * values, minlength=N_FEATURES)
+                             for c in range(len(LABELS))], axis=1).astype(np.float32)
+            grad += l2 * self.weights
+            m = 0.9 * m + 0.1 * grad
+            v = 0.999 * v + 0.001 * grad * grad
+            m_hat = m / (1 - 0.9 ** step)
+            v_hat = v / (1 - 0.999 ** step)
+            self.weights -= lr * m_hat / (np.sqrt(v_hat) + 1e-8)
+        return self
+
+    def predict(self, texts, placenames=None):
+        """返回 (标签列表, 置信度数组)。"""
+        if not len(texts):
+            return [], np.zeros(0)
+        probs = softmax(self._logits(featurize(texts, placenames, self.budget), len(texts)))
+        best = probs.argmax(axis=1)
+        return [LABELS[i] for i in best], probs[np.arange(len(best)), best]
+
+
+def softmax(logits):
+    z = logits - logits.max(axis=1, keepdims=True)
+    e = np.exp(z)
+    return e / e.sum(axis=1, keepdims=True)
+
+
+def confident(labels, confidences, thresholds):
+    return np.asarray([c >= thresholds.get(l, 1.01) for l, c in zip(labels, confidences)], dtype=bool)
+
+
+def evaluate(model, texts, labels, placenames, thresholds):
+    """在留出集上与 LLM 标签对照：达标预测的覆盖率（可省去的 API 调用占比）与一致率。"""
+    predicted, confidences = model.predict(texts, placenames)
+    taken = confident(predicted, confidences, thresholds)
+    report = {"holdout": len(labels), "covered": int(taken.sum()),
+              "coverage": round(float(taken.mean()), 4) if len(labels) else 0.0, "per_label": {}}
+    agree = [p == t for p, t, ok in zip(predicted, labels, taken) if ok]
+    report["precision"] = round(sum(agree) / len(agree), 4) if agree else None
+    for label in LABELS:
+        picked = [t for p, t, ok in zip(predicted, labels, taken) if ok and p == label]
+        if picked:
+            report["per_label"][label] = {"assigned": len(picked),
+                                          "precision": round(sum(t == label for t in picked) / len(picked), 4)}
+    return report
+
+
+def train_from_records(records, key_func, thresholds, exclude=None, budget=FEATURE_CHARS):
+    """
+    用已有分类结果训练：只取 LLM 判定的记录（正则命中、本地模型自身判定与近重复分发的记录不参与），
+    按记录键哈希留出 1/HOLDOUT_EVERY 做评估。样本不足时返回 (None, None)。
+    exclude(text) 为 True 的记录被视为正则可判定而跳过；budget 为证据窗口字数。
+    """
+    train, holdout = ([], [], []), ([], [], [])
+    for record in records:
+        label = record.get("resolution_type")
+        if label not in LABELS or record.get("label_source") in ("regex", "local", "dup"):
+            continue
+        text = str(record.get("text", ""))
+        if exclude is not None and exclude(text):
+            continue
+        target = holdout if zlib.crc32(key_func(record).encode("utf-8")) % HOLDOUT_EVERY == 0 else train
+        target[0].append(text)
+        target[1].append(label)
+        target[2].append(str(record.get("placename", "")))
+    if len(train[0]) < MIN_TRAIN_ROWS:
+        return None, None
+    model = LocalClassifier(budget).fit(*train)
+    report = evaluate(model, holdout[0], holdout[1], holdout[2], thresholds)
+    report["trained"] = len(train[0])
+    return model, report
+
+
+def format_report(report):
+    lines = [f"本地模型：训练 {report['trained']} 条，留出 {report['holdout']} 条；"
+             f"达标覆盖 {report['coverage']:.1%}（{report['covered']} 条），与 LLM 一致率 "
+             + (f"{report['precision']:.1%}" if report["precision"] is not None else "无") + "。"]
+    for label, item in report["per_label"].items():
+        lines.append(f"  {label}: 判定 {item['assigned']} 条，精确率 {item['precision']:.1%}")
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="在已有分类结果上训练并评估本地 n-gram 逻辑回归分类层")
+    parser.add_argument("--input", default="batch_classification_results.csv")
+    parser.add_argument("--threshold", default="", help="置信度阈值，如 NONE=0.95,WEAK=0.99")
+    parser.add_argument("--budget", type=int, default=FEATURE_CHARS, help="证据窗口字数，与分类阶段的 --prompt-budget 一致")
+    args = parser.parse_args()
+
+    if not table_exists(args.input):
+        print(f"错误：找不到 {args.input}")
+        sys.exit(1)
+    from extract_explanatory_sentences import check_strong_by_regex, record_key
+
+    records = read_table(args.input).fillna("").to_dict("records")
+    model, report = train_from_records(records, record_key, parse_thresholds(args.threshold), check_strong_by_regex,
+                                       args.budget)
+    if model is None:
+        print(f"可用于训练的 LLM 标注不足 {MIN_TRAIN_ROWS} 条。")
+    else:
+        print(format_report(report))
@@ -0,0 +1,63 @@
+import hashlib
+import zlib
+from collections import defaultdict
+
+import numpy as np
+
+SHINGLE = 3
+NUM_PERM = 64
+BANDS = 8
+# 候选对需估计 Jaccard 相似度不低于此值才并入同一簇
+THRESHOLD = 0.85
+_PRIME = (1 << 31) - 1
+_rng = np.random.RandomState(20240601)
+_A = _rng.randint(1, _PRIME, size=NUM_PERM).astype(np.int64)
+_B = _rng.randint(0, _PRIME, size=NUM_PERM).astype(np.int64)
+
+
+def shingles(text, k=SHINGLE):
+    if len(text) <= k:
+        return {text}
+    return {text[i:i + k] for i in range(len(text) - k + 1)}
+
+
+def minhash(text):
+    """字符 k-shingle 的 MinHash 签名（NUM_PERM 个 31 位整数）。"""
+    x = np.fromiter((zlib.crc32(s.encode("utf-8")) % _PRIME for s in shingles(text)), dtype=np.int64)
+    return ((_A[:, None] * x[None, :] + _B[:, None]) % _PRIME).min(axis=1)
+
+
+def cluster(keys, groups, texts, threshold=THRESHOLD):
+    """
+    在同一分组（地名）内按 LSH 分桶找近重复。按输入顺序逐条处理：与已有代表估计相似度
+    达到阈值的记录并入最先出现的那个代表的簇，否则自成代表。每个成员都直接与代表比较，
+    不会经由中间记录传递（A~B、B~C 不会把 A、C 并在一起）。
+    keys 为记录标识，按输入顺序给出；返回 {成员: 代表}（不含代表自身）与 {记录: 簇 ID}（只含多于一条的簇）。
+    """
+    n = len(keys)
+    signatures = [minhash(t) for t in texts]
+    rows = NUM_PERM // BANDS
+    # 桶中只放代表
+    buckets = defaultdict(list)
+    roots = list(range(n))
+    for i, (group, sig) in enumerate(zip(groups, signatures)):
+        bands = [(group, band, sig[band * rows:(band + 1) * rows].tobytes()) for band in range(BANDS)]
+        for r in sorted({r for b in bands for r in buckets.get(b, ())}):
+            if np.mean(signatures[r] == sig) >= threshold:
+                roots[i] = r
+                break
+        else:
+            for b in bands:
+                buckets[b].append(i)
+
+    sizes = defaultdict(int)
+    for r in roots:
+        sizes[r] += 1
+    followers, cluster_ids = {}, {}
+    for i, r in enumerate(roots):
+        if sizes[r] < 2:
+            continue
+        cluster_ids[keys[i]] = "c" + hashlib.sha1(f"{groups[r]}\0{texts[r]}".encode("utf-8")).hexdigest()[:12]
+        if r != i:
+            followers[keys[i]] = keys[r]
+    return followers, cluster_ids
@@ -0,0 +1,131 @@
+import argparse
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+DEFAULT_CACHE_DB = "llm_response_cache.sqlite"
+
+
+def prompt_version(system_prompt):
+    return hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()[:12]
+
+
+def make_key(model, system_prompt, user_msg, temperature):
+    raw = json.dumps([model, system_prompt, user_msg, temperature], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """
+    以 (模型, 系统提示词, 用户消息, temperature) 的哈希为键的 LLM 结果缓存（SQLite/WAL）。
+    支持按条数上限 (LRU) 与存活天数淘汰，并可按模型或提示词版本失效。
+    """
+
+    def __init__(self, path=DEFAULT_CACHE_DB, max_entries=500000, max_age_days=180):
+        self.path = path
+        self.max_entries = max_entries
+        self.max_age_days = max_age_days
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS responses (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                prompt_version TEXT NOT NULL,
+                label TEXT NOT NULL,
+                evidence TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )""")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_model_prompt ON responses (model, prompt_version)")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_accessed ON responses (accessed_at)")
+        self.conn.commit()
+
+    def get(self, key):
+        with self.lock:
+            row = self.conn.execute(
+                "SELECT label, evidence FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE responses SET accessed_at = ? WHERE key = ?", (time.time(), key))
+            # 与 put 一样立即提交：否则写事务一直未结束，其他连接无法写入，访问时间也可能丢失
+            self.conn.commit()
+            return row[0], row[1]
+
+    def put(self, key, model, version, label, evidence):
+        now = time.time()
+        with self.lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (key, model, version, label, evidence, now, now))
+            self.conn.commit()
+
+    def evict(self):
+        """先删过期条目，再按最近访问时间裁剪到 max_entries，返回删除条数。"""
+        with self.lock:
+            removed = 0
+            if self.max_age_days:
+                cutoff = time.time() - self.max_age_days * 86400
+                removed += self.conn.execute(
+                    "DELETE FROM responses WHERE created_at < ?", (cutoff,)).rowcount
+            if self.max_entries:
+                removed += self.conn.execute("""
+                    DELETE FROM responses WHERE key IN (
+                        SELECT key FROM responses ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                    )""", (self.max_entries,)).rowcount
+            self.conn.commit()
+            return removed
+
+    def invalidate(self, model=None, version=None):
+        clauses, params = [], []
+        if model:
+            clauses.append("model = ?")
+            params.append(model)
+        if version:
+            clauses.append("prompt_version = ?")
+            params.append(version)
+        where = " WHERE " + " AND ".join(clauses) if clauses else ""
+        with self.lock:
+            removed = self.conn.execute("DELETE FROM responses" + where, params).rowcount
+            self.conn.commit()
+            return removed
+
+    def stats(self):
+        with self.lock:
+            rows = self.conn.execute("""
+                SELECT model, prompt_version, COUNT(*) FROM responses
+                GROUP BY model, prompt_version ORDER BY model, prompt_version""").fetchall()
+        return {"hits": self.hits, "misses": self.misses,
+                "entries": [{"model": m, "prompt_version": v, "count": c} for m, v, c in rows]}
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="LLM 结果缓存维护")
+    parser.add_argument("--db", default=DEFAULT_CACHE_DB)
+    parser.add_argument("--invalidate-model", help="删除指定模型的全部缓存")
+    parser.add_argument("--invalidate-prompt", help="删除指定提示词版本的全部缓存")
+    parser.add_argument("--evict", action="store_true", help="按条数上限与存活天数淘汰")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.db)
+    if args.invalidate_model or args.invalidate_prompt:
+        n = cache.invalidate(args.invalidate_model, args.invalidate_prompt)
+        print(f"已失效 {n} 条缓存。")
+    if args.evict:
+        print(f"已淘汰 {cache.evict()} 条缓存。")
+    for entry in cache.stats()["entries"]:
+        print(f"{entry['model']}  prompt={entry['prompt_version']}  {entry['count']} 条")
+    cache.close()
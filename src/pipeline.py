@@ -0,0 +1,228 @@
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import sys
+import time
+
+from common import metrics, table_io
+from common.table_io import table_path
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STATE_FILE = ".pipeline_state.json"
+CACHE_DIR = ".pipeline_cache"
+
+
+def load_module(rel_dir, name):
+    """各阶段脚本互相独立、按同目录导入辅助模块，这里把脚本目录加入 sys.path 后再导入。"""
+    path = os.path.join(ROOT, rel_dir)
+    if path not in sys.path:
+        sys.path.insert(0, path)
+    return importlib.import_module(name)
+
+
+class Stage:
+    def __init__(self, name, run, code, inputs, outputs, deps=(), config=None):
+        self.name = name
+        self.run = run
+        self.code = code
+        self.inputs = inputs
+        self.outputs = outputs
+        self.deps = list(deps)
+        self.config = config or {}
+
+
+class Fingerprinter:
+    """
+    计算文件/目录的内容哈希。以 (大小, mtime) 记忆上次结果，
+    未改动的文件不必重新读入。
+    """
+
+    def __init__(self, memo):
+        self.memo = memo
+
+    def file(self, path):
+        st = os.stat(path)
+        stamp = [st.st_size, st.st_mtime_ns]
+        cached = self.memo.get(path)
+        if cached and cached[0] == stamp:
+            return cached[1]
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        self.memo[path] = [stamp, h.hexdigest()]
+        return h.hexdigest()
+
+    def path(self, path):
+        if not os.path.exists(path):
+            return "missing"
+        if os.path.isfile(path):
+            return self.file(path)
+        h = hashlib.sha256()
+        for name in sorted(os.listdir(path)):
+            full = os.path.join(path, name)
+            if os.path.isfile(full) and not name.startswith("."):
+                h.update(f"{name}\0{self.file(full)}\0".encode("utf-8"))
+        return h.hexdigest()
+
+
+def stage_fingerprint(stage, fp):
+    h = hashlib.sha256()
+    for rel in stage.code:
+        h.update(rel.encode("utf-8"))
+        h.update(fp.file(os.path.join(ROOT, rel)).encode("utf-8"))
+    h.update(json.dumps(stage.config, sort_keys=True, ensure_ascii=False).encode("utf-8"))
+    for path in stage.inputs:
+        h.update(f"{path}\0{fp.path(path)}\0".encode("utf-8"))
+    return h.hexdigest()
+
+
+def topological_order(stages):
+    by_name = {s.name: s for s in stages}
+    order, visiting, done = [], set(), set()
+
+    def visit(stage):
+        if stage.name in done:
+            return
+        if stage.name in visiting:
+            raise ValueError(f"阶段依赖存在环：{stage.name}")
+        visiting.add(stage.name)
+        for dep in stage.deps:
+            visit(by_name[dep])
+        visiting.discard(stage.name)
+        done.add(stage.name)
+        order.append(stage)
+
+    for stage in stages:
+        visit(stage)
+    return order
+
+
+def build_stages(args):
+    extract_cache = os.path.join(CACHE_DIR, "extract")
+
+    def run_transport():
+        load_module("utils", "transport_to_txt").main(args.html_dir, args.txt_dir, args.workers)
+
+    def run_extract():
+        load_module("src/extraction", "extract_placename_records").main(
+            args.txt_dir, "placename_records.csv", args.workers, extract_cache)
+
+    def run_resolve():
+        load_module("src/resolution", "resolve_naming_target").main(args.chunksize)
+
+    def run_classify():
+        load_module("src/extraction", "extract_explanatory_sentences").main(
+            concurrency=args.concurrency, batch_size=args.batch_size, local_tier=args.local_tier,
+            dedup=args.dedup, chunksize=args.chunksize)
+
+    def run_report():
+        from common.analytics import run_reports
+        run_reports(plots=not args.no_plots, workers=args.workers)
+
+    records = table_path("placename_records.csv")
+    resolved = table_path("placename_records_resolved.csv")
+    results = table_path("batch_classification_results.csv")
+    # 各阶段都经由这两个模块读写中间表、记录指标，改动它们须使所有阶段失效
+    common = ["src/common/table_io.py", "src/common/metrics.py"]
+    stages = [
+        Stage("transport", run_transport, ["utils/transport_to_txt.py"] + common,
+              [args.html_dir], [args.txt_dir]),
+        Stage("extract", run_extract, ["src/extraction/extract_placename_records.py", "src/common/record_ids.py"] + common,
+              [args.txt_dir], [records], deps=["transport"]),
+        Stage("resolve", run_resolve, ["src/resolution/resolve_naming_target.py", "src/common/record_ids.py"] + common,
+              [records], [resolved], deps=["extract"]),
+        Stage("classify", run_classify,
+              ["src/extraction/extract_explanatory_sentences.py", "src/extraction/llm_client.py",
+               "src/extraction/checkpoint_journal.py", "src/extraction/response_cache.py",
+               "src/extraction/local_classifier.py", "src/extraction/near_duplicates.py",
+               "src/extraction/evidence_window.py", "src/common/record_ids.py"] + common,
+              [resolved],
+              [results] + [f"extracted_{l}.csv" for l in ["STRONG", "WEAK", "NONE"]],
+              deps=["resolve"], config={"batch_size": args.batch_size, "local_tier": args.local_tier,
+                                               "dedup": args.dedup}),
+        Stage("report", run_report, ["src/common/analytics.py", "src/common/plotting.py",
+                                     "src/common/record_ids.py"] + common,
+              [results], ["analysis_stats.csv", "analysis_record_subtypes.csv", "analysis_summary_en.csv",
+                         "mining_strong_logic.csv"],
+              deps=["classify"], config={"plots": not args.no_plots}),
+    ]
+    if args.html_dir is None:
+        # 已有 TXT 语料时从抽取阶段开始
+        stages = [s for s in stages if s.name != "transport"]
+        stages[0].deps = []
+    return stages
+
+
+def load_state():
+    if not os.path.exists(STATE_FILE):
+        return {"stages": {}, "files": {}}
+    with open(STATE_FILE, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_state(state):
+    tmp_path = STATE_FILE + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(state, f, ensure_ascii=False, indent=1)
+    os.replace(tmp_path, STATE_FILE)
+
+
+def run_pipeline(args):
+    state = load_state()
+    fp = Fingerprinter(state["files"])
+    stages = topological_order(build_stages(args))
+    targets = set(args.only) if args.only else None
+
+    for stage in stages:
+        if targets and stage.name not in targets:
+            continue
+        fingerprint = stage_fingerprint(stage, fp)
+        outputs_ok = all(os.path.exists(p) for p in stage.outputs)
+        forced = stage.name in args.force or "all" in args.force
+        if fingerprint == state["stages"].get(stage.name) and outputs_ok and not forced:
+            print(f"[跳过] {stage.name}：输入、代码与配置均未变化。")
+            continue
+        if args.dry_run:
+            print(f"[待执行] {stage.name}")
+            continue
+
+        print(f"[执行] {stage.name} ...")
+        start = time.perf_counter()
+        profile = True if (stage.name in args.profile or "all" in args.profile) else None
+        with metrics.stage(stage.name, profile=profile):
+            stage.run()
+        print(f"[完成] {stage.name}，用时 {time.perf_counter() - start:.1f} 秒。")
+        state["stages"][stage.name] = fingerprint
+        save_state(state)
+    save_state(state)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="地名命名解释识别全流程：按阶段指纹增量执行")
+    parser.add_argument("--workdir", default=".", help="中间文件与结果所在目录")
+    parser.add_argument("--html-dir", default=None, help="HTML 原文目录；缺省时从已有 TXT 开始")
+    parser.add_argument("--txt-dir", required=True, help="TXT 语料目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--concurrency", type=int, default=8, help="分类阶段的 LLM 并发数")
+    parser.add_argument("--batch-size", type=int, default=1, help="分类阶段每次请求打包的记录数")
+    parser.add_argument("--local-tier", action="store_true", help="分类阶段启用本地模型层")
+    parser.add_argument("--dedup", action="store_true", help="分类阶段近重复记录只请求一次 LLM")
+    parser.add_argument("--chunksize", type=int, default=None, help="消解与分类阶段按块流式处理的行数")
+    parser.add_argument("--only", nargs="*", default=None, help="只执行指定阶段")
+    parser.add_argument("--force", nargs="*", default=[], help="强制重跑的阶段，all 表示全部")
+    parser.add_argument("--dry-run", action="store_true", help="只列出需要执行的阶段")
+    parser.add_argument("--profile", nargs="*", default=[], help="对指定阶段做 cProfile，all 表示全部")
+    parser.add_argument("--no-plots", action="store_true", help="报告阶段只生成 CSV 统计")
+    parser.add_argument("--format", default=table_io.TABLE_FORMAT, choices=sorted(table_io.EXTENSIONS),
+                        help="阶段间中间表格式")
+    args = parser.parse_args()
+    table_io.TABLE_FORMAT = args.format
+
+    if args.html_dir:
+        args.html_dir = os.path.abspath(args.html_dir)
+    args.txt_dir = os.path.abspath(args.txt_dir)
+    os.chdir(args.workdir)
+    run_pipeline(args)
@@ -1,41 +1,70 @@
-import pandas as pd
-from langchain_openai import OpenAIEmbeddings, ChatOpenAI
-from langchain_community.vectorstores import FAISS
-from langchain_core.documents import Document
+from langchain_openai import ChatOpenAI
 from langchain_core.prompts import ChatPromptTemplate
-from langchain_core.runnables import RunnablePassthrough
 from langchain_core.output_parsers import StrOutputParser
+import argparse
 import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from embedding_backends import get_embeddings
+from indexer import add_index_arguments, sync_index
+from lexical_index import HybridRetriever, load_or_build
+from query_modes import add_query_mode_arguments, run_batch, serve
 
 os.environ["OPENAI_API_KEY"] = ""
 os.environ["OPENAI_BASE_URL"] = ""
 
-def run_lcel_rag():
+TEMPLATE = """你是一名严谨的历史地理学家。请基于以下检索到的文献片段回答问题。
 
-    embeddings = OpenAIEmbeddings(
-        model="BAAI/bge-m3", 
-        chunk_size=64 
-    ) 
-    index_path = "faiss_index_storage"
-    
-    if os.path.exists(index_path):
-        print("检测到本地索引，正在快速加载...")
-        vectorstore = FAISS.load_local(index_path, embeddings, allow_dangerous_deserialization=True)
+[已知文献信息]:
+{context}
+
+[用户提问]: {question}
+
+[深度考据结果]:"""
+
+
+class RagEngine:
+    """检索器与生成链只构建一次；answer() 分别计时检索与生成，供交互、批量与服务三种模式共用。"""
+
+    def __init__(self, retriever, generation_chain):
+        self.retriever = retriever
+        self.generation_chain = generation_chain
+
+    def answer(self, question):
+        start = time.perf_counter()
+        docs = self.retriever.invoke(question)
+        retrieved = time.perf_counter()
+        result = self.generation_chain.invoke({"context": docs, "question": question})
+        finished = time.perf_counter()
+        return {
+            "question": question,
+            "answer": result,
+            "sources": [{"record_id": d.metadata.get("record_id"), "source": d.metadata.get("source"),
+                         "type": d.metadata.get("type"), "content": d.page_content} for d in docs],
+            "retrieval_ms": round((retrieved - start) * 1000, 2),
+            "generation_ms": round((finished - retrieved) * 1000, 2),
+        }
+
+
+def build_engine(backend=None, store=None, index_path=None, retriever_mode="hybrid"):
+
+    # backend=hashed 时检索完全离线；store=mmap 时索引以只读映射方式打开
+    embeddings, embedding_model = get_embeddings(backend)
+
+    # 按清单增量同步：只为新增/变化的 STRONG/WEAK 记录计算向量，其余走缓存
+    print("正在同步本地向量索引...")
+    vectorstore = sync_index(embeddings, embedding_model, index_path=index_path, store=store)
+    if vectorstore is None:
+        print("错误：没有可入库的 STRONG/WEAK 记录。")
+        return None
+
+    if retriever_mode == "hybrid":
+        # 问句含已知地名时直接走本地词法索引，不再调用向量接口
+        retriever = HybridRetriever(lexical=load_or_build(), vectorstore=vectorstore, k=5)
     else:
-        print("未检测到本地索引，正在首次构建向量库（此过程较慢）...")
-        df = pd.read_csv("batch_classification_results.csv").fillna("")
-        documents = [
-            Document(
-                page_content=f"地名：{row['placename']}\n记载：{row['text']}",
-                metadata={"source": row['source'], "type": row['resolution_type']}
-            ) for _, row in df[df['resolution_type'].isin(['STRONG', 'WEAK'])].iterrows()
-        ]
-        vectorstore = FAISS.from_documents(documents, embeddings)
-
-        vectorstore.save_local(index_path)
-        print("向量库构建完成并已保存至本地。")
-
-    retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
+        retriever = vectorstore.as_retriever(search_kwargs={"k": 5})
     
     model = ChatOpenAI(
         model="deepseek-ai/DeepSeek-V3", 
@@ -43,24 +72,14 @@ def run_lcel_rag():
         max_tokens=2048
     )
 
-    template = """你是一名严谨的历史地理学家。请基于以下检索到的文献片段回答问题。
-
-[已知文献信息]:
-{context}
+    prompt = ChatPromptTemplate.from_template(TEMPLATE)
 
-[用户提问]: {question}
+    # 与原 {"context": retriever, ...} 链等价，检索单独执行以便计时
+    generation_chain = prompt | model | StrOutputParser()
+    return RagEngine(retriever, generation_chain)
 
-[深度考据结果]:"""
-    
-    prompt = ChatPromptTemplate.from_template(template)
-
-    lcel_rag_chain = (
-        {"context": retriever, "question": RunnablePassthrough()}
-        | prompt
-        | model
-        | StrOutputParser()
-    )
 
+def run_interactive(engine):
     print("\n" + "="*50)
     print("古籍地名命名考据系统已就绪（输入 'exit' 或 'quit' 退出）")
     print("="*50)
@@ -77,10 +96,34 @@ def run_lcel_rag():
 
         print("正在检索文献并生成分析...")
         try:
-            result = lcel_rag_chain.invoke(user_input)
-            print(f"\n【考据结论】\n{result}")
+            result = engine.answer(user_input)
+            print(f"\n【考据结论】\n{result['answer']}")
+            print(f"（检索 {result['retrieval_ms']} ms，生成 {result['generation_ms']} ms）")
         except Exception as e:
             print(f"发生错误: {e}")
 
+
+def run_lcel_rag(backend=None, store=None, index_path=None, retriever_mode="hybrid"):
+    engine = build_engine(backend, store, index_path, retriever_mode)
+    if engine is not None:
+        run_interactive(engine)
+
+
 if __name__ == "__main__":
-    run_lcel_rag()
+    parser = argparse.ArgumentParser(description="古籍地名命名考据 RAG")
+    parser.add_argument("--mode", default="interactive", choices=["interactive", "batch", "serve"])
+    add_index_arguments(parser)
+    parser.add_argument("--retriever", default="hybrid", choices=["hybrid", "dense"],
+                        help="hybrid：BM25 词法 + 向量融合；dense：仅向量检索")
+    add_query_mode_arguments(parser)
+    args = parser.parse_args()
+
+    engine = build_engine(args.backend, args.store, args.index, args.retriever)
+    if engine is None:
+        sys.exit(1)
+    if args.mode == "batch":
+        run_batch(engine, args.questions, args.output, args.concurrency)
+    elif args.mode == "serve":
+        serve(engine, args.host, args.port)
+    else:
+        run_interactive(engine)
@@ -0,0 +1,66 @@
+import os
+import zlib
+from functools import lru_cache
+
+import numpy as np
+from langchain_core.embeddings import Embeddings
+
+# openai：远程向量接口；hashed：本地哈希字符 n-gram，无需联网
+EMBEDDING_BACKEND = os.environ.get("EMBEDDING_BACKEND", "openai")
+OPENAI_EMBEDDING_MODEL = "BAAI/bge-m3"
+HASHED_DIM = 512
+HASHED_NGRAMS = (1, 2, 3)
+
+
+@lru_cache(maxsize=1 << 18)
+def _bucket(gram, dim):
+    # crc32 跨进程稳定（内置 hash() 受 PYTHONHASHSEED 影响），最高位作符号
+    h = zlib.crc32(gram.encode("utf-8"))
+    return h % dim, -1.0 if h & 0x80000000 else 1.0
+
+
+class HashedNgramEmbeddings(Embeddings):
+    """
+    字符 n-gram 特征哈希到定长向量并做 L2 归一化。
+    不需要训练与网络，适合离线环境与测试；语义能力弱于 bge-m3。
+    """
+
+    # 计算成本远低于一次缓存查找，不经磁盘向量缓存
+    cacheable = False
+
+    def __init__(self, dim=HASHED_DIM, ngrams=HASHED_NGRAMS):
+        self.dim = dim
+        self.ngrams = tuple(ngrams)
+
+    @property
+    def model_name(self):
+        return f"hashed-ngram-{'-'.join(map(str, self.ngrams))}-{self.dim}"
+
+    def _embed(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        for n in self.ngrams:
+            for i in range(len(text) - n + 1):
+                idx, sign = _bucket(text[i:i + n], self.dim)
+                vec[idx] += sign
+        norm = np.linalg.norm(vec)
+        if norm:
+            vec /= norm
+        return vec.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def get_embeddings(backend=None):
+    """返回 (Embeddings 实例, 模型名)；模型名用于向量缓存与索引清单。"""
+    backend = backend or EMBEDDING_BACKEND
+    if backend == "hashed":
+        embeddings = HashedNgramEmbeddings()
+        return embeddings, embeddings.model_name
+    if backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model=OPENAI_EMBEDDING_MODEL, chunk_size=64), OPENAI_EMBEDDING_MODEL
+    raise ValueError(f"未知的向量后端：{backend}")
@@ -0,0 +1,233 @@
+import argparse
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.record_ids import RECORD_ID, ensure_ids
+from common.table_io import read_table
+from embedding_backends import EMBEDDING_BACKEND, get_embeddings
+from vector_store import store_class
+
+INPUT_FILE = "batch_classification_results.csv"
+# faiss：LangChain FAISS 索引；mmap：内存映射 float16 向量库（见 vector_store.py）
+VECTOR_STORE = os.environ.get("VECTOR_STORE", "faiss")
+INDEX_PATHS = {"faiss": "faiss_index_storage", "mmap": "mmap_index_storage"}
+MANIFEST_FILE = "manifest.json"
+EMBEDDING_CACHE_DB = "embedding_cache.sqlite"
+INDEXED_TYPES = ["STRONG", "WEAK"]
+
+
+def text_hash(text):
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    以 (模型, 文本哈希) 为键的向量缓存（SQLite/WAL），向量按 float32 字节存储。
+    重新分类或重建索引时，未变化的文本直接取缓存，不再调用向量接口。
+    """
+
+    def __init__(self, path=EMBEDDING_CACHE_DB):
+        self.path = path
+        self.lock = threading.Lock()
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS embeddings (
+                model TEXT NOT NULL,
+                text_hash TEXT NOT NULL,
+                vector BLOB NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (model, text_hash)
+            )""")
+        self.conn.commit()
+
+    def get_many(self, model, hashes):
+        found = {}
+        hashes = list(hashes)
+        with self.lock:
+            # SQLite 默认最多 999 个绑定参数
+            for i in range(0, len(hashes), 500):
+                part = hashes[i:i + 500]
+                rows = self.conn.execute(
+                    f"SELECT text_hash, vector FROM embeddings WHERE model = ? AND text_hash IN ({','.join('?' * len(part))})",
+                    [model] + part).fetchall()
+                for h, blob in rows:
+                    found[h] = np.frombuffer(blob, dtype=np.float32)
+        return found
+
+    def put_many(self, model, items):
+        now = time.time()
+        rows = [(model, h, np.asarray(v, dtype=np.float32).tobytes(), now) for h, v in items]
+        with self.lock:
+            self.conn.executemany("INSERT OR REPLACE INTO embeddings VALUES (?, ?, ?, ?)", rows)
+            self.conn.commit()
+
+    def invalidate(self, model):
+        with self.lock:
+            removed = self.conn.execute("DELETE FROM embeddings WHERE model = ?", (model,)).rowcount
+            self.conn.commit()
+            return removed
+
+    def close(self):
+        with self.lock:
+            self.conn.commit()
+            self.conn.close()
+
+
+class CachedEmbeddings(Embeddings):
+    """包装任意 LangChain Embeddings：命中缓存的文本不再请求接口，只对未命中部分批量计算。"""
+
+    def __init__(self, embeddings, cache, model):
+        self.embeddings = embeddings
+        self.cache = cache
+        self.model = model
+        self.hits = 0
+        self.misses = 0
+
+    def embed_documents(self, texts):
+        hashes = [text_hash(t) for t in texts]
+        vectors = self.cache.get_many(self.model, set(hashes))
+        by_hash = dict(zip(hashes, texts))
+        missing = [h for h in by_hash if h not in vectors]
+        if missing:
+            computed = np.asarray(self.embeddings.embed_documents([by_hash[h] for h in missing]), dtype=np.float32)
+            self.cache.put_many(self.model, zip(missing, computed))
+            vectors.update(zip(missing, computed))
+        self.hits += len(by_hash) - len(missing)
+        self.misses += len(missing)
+        return [vectors[h].tolist() for h in hashes]
+
+    def embed_query(self, text):
+        return self.embeddings.embed_query(text)
+
+
+def iter_documents(df):
+    """
+    把 STRONG/WEAK 记录转成检索文档，逐条产出 (文档 ID, 地名, 记载, Document)。
+    ID 为 (正文, 元数据) 的内容哈希加重复序号：记录内容或类别一旦变化，其 ID 随之变化，
+    由增量同步当作“删旧增新”处理。向量索引与词法索引共用同一套 ID。
+    元数据带上 record_id，检索结果可直接联接回分类结果表。
+    """
+    df = df[df["resolution_type"].isin(INDEXED_TYPES)]
+    seen = {}
+    for rid, placename, text, source, rtype in zip(df[RECORD_ID], df["placename"], df["text"], df["source"],
+                                                   df["resolution_type"]):
+        content = f"地名：{placename}\n记载：{text}"
+        metadata = {"source": source, "type": rtype, RECORD_ID: rid}
+        base = text_hash(json.dumps([content, metadata], ensure_ascii=False, sort_keys=True))[:32]
+        n = seen.get(base, 0)
+        seen[base] = n + 1
+        doc_id = f"{base}-{n}"
+        yield doc_id, placename, text, Document(id=doc_id, page_content=content, metadata=metadata)
+
+
+def build_documents(df):
+    return {doc_id: doc for doc_id, _, _, doc in iter_documents(df)}
+
+
+def load_records(input_file=INPUT_FILE):
+    df = read_table(input_file, columns=[RECORD_ID, "placename", "text", "source", "resolution_type"]).fillna("")
+    return ensure_ids(df)
+
+
+def load_manifest(index_path):
+    path = os.path.join(index_path, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def save_manifest(index_path, manifest):
+    path = os.path.join(index_path, MANIFEST_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+
+
+def sync_index(embeddings, model, input_file=INPUT_FILE, index_path=None,
+               cache_db=EMBEDDING_CACHE_DB, rebuild=False, store=None):
+    """
+    按清单对比当前 STRONG/WEAK 记录与已入库文档：只为新增/变化的记录计算向量，
+    删除已不存在的记录，返回同步后的向量库。远程向量经磁盘缓存复用。
+    """
+    store = store or VECTOR_STORE
+    store_cls = store_class(store)
+    index_path = index_path or INDEX_PATHS[store]
+
+    docs = build_documents(load_records(input_file))
+    cache = EmbeddingCache(cache_db) if getattr(embeddings, "cacheable", True) else None
+    cached = CachedEmbeddings(embeddings, cache, model) if cache else embeddings
+
+    manifest = None if rebuild else load_manifest(index_path)
+    if manifest is not None and manifest.get("model") != model:
+        print(f"索引使用的向量模型 ({manifest.get('model')}) 与当前 ({model}) 不同，将重建。")
+        manifest = None
+    elif manifest is not None and manifest.get("store", "faiss") != store:
+        print(f"索引类型 ({manifest.get('store', 'faiss')}) 与当前 ({store}) 不同，将重建。")
+        manifest = None
+    elif manifest is None and os.path.exists(index_path) and not rebuild:
+        print("旧版索引缺少清单，将重建一次。")
+
+    vectorstore, indexed = None, []
+    if manifest is not None:
+        vectorstore = store_cls.load_local(index_path, cached, allow_dangerous_deserialization=True)
+        indexed = manifest["ids"]
+
+    indexed_set = set(indexed)
+    removed = [i for i in indexed if i not in docs]
+    added = [i for i in docs if i not in indexed_set]
+
+    if removed:
+        vectorstore.delete(removed)
+    if added:
+        texts = [docs[i].page_content for i in added]
+        metadatas = [docs[i].metadata for i in added]
+        if vectorstore is None:
+            vectorstore = store_cls.from_texts(texts, cached, metadatas=metadatas, ids=added)
+        else:
+            vectorstore.add_texts(texts, metadatas=metadatas, ids=added)
+
+    if vectorstore is not None and (added or removed or manifest is None):
+        vectorstore.save_local(index_path)
+        save_manifest(index_path, {"model": model, "store": store, "updated_at": time.time(),
+                                   "ids": [i for i in indexed if i in docs] + added})
+    print(f"索引同步：共 {len(docs)} 条文档，新增 {len(added)}，删除 {len(removed)}。")
+    if cache:
+        # 缓存随同步结束关闭，返回的向量库改用原始向量接口（查询向量本就不经缓存）
+        if vectorstore is not None:
+            vectorstore.embedding_function = embeddings
+        cache.close()
+        print(f"向量缓存命中 {cached.hits}，新计算 {cached.misses}。")
+    return vectorstore
+
+
+def add_index_arguments(parser):
+    parser.add_argument("--backend", default=EMBEDDING_BACKEND, choices=["openai", "hashed"],
+                        help="向量后端：远程接口或本地哈希 n-gram")
+    parser.add_argument("--store", default=VECTOR_STORE, choices=sorted(INDEX_PATHS),
+                        help="向量库类型")
+    parser.add_argument("--index", default=None, help="索引目录，缺省按向量库类型决定")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="增量同步 RAG 向量索引")
+    parser.add_argument("--input", default=INPUT_FILE)
+    add_index_arguments(parser)
+    parser.add_argument("--rebuild", action="store_true", help="忽略清单，全量重建（向量仍走缓存）")
+    args = parser.parse_args()
+
+    embeddings, model = get_embeddings(args.backend)
+    sync_index(embeddings, model, args.input, args.index, rebuild=args.rebuild, store=args.store)
@@ -0,0 +1,216 @@
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import time
+from collections import Counter
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from indexer import INPUT_FILE, iter_documents, load_records
+from vector_store import DocsFile
+
+LEXICAL_INDEX_PATH = "lexical_index_storage"
+POSTINGS_FILE = "postings.npz"
+META_FILE = "meta.json"
+DOCS_FILE = "docs.jsonl"
+NGRAMS = (2, 3)
+BM25_K1 = 1.2
+BM25_B = 0.75
+RRF_K = 60
+
+
+def char_ngrams(text, ngrams=NGRAMS):
+    return [text[i:i + n] for n in ngrams for i in range(len(text) - n + 1)]
+
+
+class LexicalIndex:
+    """
+    地名与记载的字符二元/三元组倒排索引，BM25 打分。
+    倒排表以 CSR 数组（indptr/doc/tf）压缩存盘，另建 地名 -> 文档 的精确查找表；
+    只依赖 numpy，查询不需要网络。
+    """
+
+    def __init__(self, vocab, indptr, postings, tfs, doc_len, ids, names, path=None, docs=None, offsets=None):
+        self.vocab = vocab
+        self.indptr = indptr
+        self.postings = postings
+        self.tfs = tfs
+        self.doc_len = doc_len
+        self.avgdl = float(doc_len.mean()) if len(doc_len) else 0.0
+        self.ids = ids
+        self.names = names
+        self.max_name_len = max((len(n) for n in names), default=0)
+        self.path = path
+        self._docs = docs
+        self._offsets = offsets
+        # 文件在加载时映射好，查询线程之间不共享文件位置
+        self._docs_fh = DocsFile(os.path.join(path, DOCS_FILE)) if docs is None and path else None
+        n = len(ids)
+        df = np.diff(indptr).astype(np.float64)
+        self.idf = np.log(1.0 + (n - df + 0.5) / (df + 0.5)).astype(np.float32)
+
+    @classmethod
+    def build(cls, records):
+        """records 为 iter_documents 产出的 (ID, 地名, 记载, Document)。"""
+        vocab, term_docs, term_tfs = {}, [], []
+        doc_len, ids, names, docs = [], [], {}, []
+        for pos, (doc_id, placename, text, doc) in enumerate(records):
+            grams = char_ngrams(placename) + char_ngrams(text)
+            for gram, tf in Counter(grams).items():
+                tid = vocab.setdefault(gram, len(vocab))
+                if tid == len(term_docs):
+                    term_docs.append([])
+                    term_tfs.append([])
+                term_docs[tid].append(pos)
+                term_tfs[tid].append(tf)
+            doc_len.append(len(grams))
+            ids.append(doc_id)
+            names.setdefault(placename, []).append(pos)
+            docs.append(doc)
+        indptr = np.zeros(len(term_docs) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(d) for d in term_docs])
+        postings = np.fromiter((p for d in term_docs for p in d), dtype=np.int32, count=indptr[-1])
+        tfs = np.fromiter((t for d in term_tfs for t in d), dtype=np.uint16, count=indptr[-1])
+        return cls(vocab, indptr, postings, tfs, np.asarray(doc_len, dtype=np.int32), ids, names, docs=docs)
+
+    @staticmethod
+    def signature(ids):
+        return hashlib.sha256("\n".join(ids).encode("utf-8")).hexdigest()
+
+    def save(self, path=LEXICAL_INDEX_PATH):
+        tmp_path = path.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        offsets = np.zeros(len(self.ids), dtype=np.int64)
+        with open(os.path.join(tmp_path, DOCS_FILE), "wb") as f:
+            for i in range(len(self.ids)):
+                doc = self.document(i)
+                offsets[i] = f.tell()
+                f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata},
+                                   ensure_ascii=False).encode("utf-8") + b"\n")
+        np.savez_compressed(os.path.join(tmp_path, POSTINGS_FILE), indptr=self.indptr, postings=self.postings,
+                            tfs=self.tfs, doc_len=self.doc_len, offsets=offsets)
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"signature": self.signature(self.ids), "ngrams": list(NGRAMS),
+                       "vocab": list(self.vocab), "ids": self.ids, "names": self.names},
+                      f, ensure_ascii=False)
+        shutil.rmtree(path, ignore_errors=True)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path=LEXICAL_INDEX_PATH):
+        with open(os.path.join(path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        arrays = np.load(os.path.join(path, POSTINGS_FILE))
+        vocab = {gram: i for i, gram in enumerate(meta["vocab"])}
+        index = cls(vocab, arrays["indptr"], arrays["postings"], arrays["tfs"], arrays["doc_len"],
+                    meta["ids"], meta["names"], path=path, offsets=arrays["offsets"])
+        index.stored_signature = meta["signature"]
+        return index
+
+    def document(self, i):
+        if self._docs is not None:
+            return self._docs[i]
+        item = self._docs_fh.read(self._offsets[i])
+        return Document(id=self.ids[i], page_content=item["page_content"], metadata=item["metadata"])
+
+    def match_names(self, query):
+        """查询中出现的已知地名（取最长匹配），返回对应文档位置。"""
+        for length in range(min(self.max_name_len, len(query)), 1, -1):
+            hits = []
+            for i in range(len(query) - length + 1):
+                hits.extend(self.names.get(query[i:i + length], ()))
+            if hits:
+                return list(dict.fromkeys(hits))
+        return []
+
+    def scores(self, query):
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for gram, qtf in Counter(char_ngrams(query)).items():
+            tid = self.vocab.get(gram)
+            if tid is None:
+                continue
+            lo, hi = self.indptr[tid], self.indptr[tid + 1]
+            docs = self.postings[lo:hi]
+            tf = self.tfs[lo:hi].astype(np.float32)
+            norm = BM25_K1 * (1 - BM25_B + BM25_B * self.doc_len[docs] / self.avgdl)
+            scores[docs] += qtf * self.idf[tid] * tf * (BM25_K1 + 1) / (tf + norm)
+        return scores
+
+    def search(self, query, k=5):
+        """返回 [(文档位置, 得分)]；命中精确地名的文档排在最前。"""
+        scores = self.scores(query)
+        exact = self.match_names(query)
+        if exact:
+            exact = sorted(exact, key=lambda i: -scores[i])[:k]
+            scores[exact] = -np.inf
+        rest = k - len(exact)
+        top = []
+        if rest > 0 and len(scores):
+            top = np.argpartition(-scores, min(rest, len(scores)) - 1)[:rest]
+            top = [int(i) for i in top[np.argsort(-scores[top], kind="stable")] if scores[i] > 0]
+        return [(i, "exact") for i in exact] + [(i, float(scores[i])) for i in top], bool(exact)
+
+
+def load_or_build(input_file=INPUT_FILE, path=LEXICAL_INDEX_PATH, rebuild=False):
+    """文档集合（ID 列表）未变时直接加载磁盘索引，否则重建并保存。"""
+    records = list(iter_documents(load_records(input_file)))
+    signature = LexicalIndex.signature([r[0] for r in records])
+    if not rebuild and os.path.exists(os.path.join(path, META_FILE)):
+        index = LexicalIndex.load(path)
+        if index.stored_signature == signature:
+            return index
+    index = LexicalIndex.build(records)
+    index.save(path)
+    print(f"词法索引已重建：{len(index.ids)} 条文档，{len(index.vocab)} 个 n-gram。")
+    return index
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    词法 + 向量混合检索。问句中出现已知地名时只用词法索引（毫秒内返回，不调用向量接口）；
+    否则按倒数排名融合 (RRF) 合并 BM25 与向量检索结果。
+    """
+
+    lexical: object
+    vectorstore: object = None
+    k: int = 5
+
+    def _get_relevant_documents(self, query, *, run_manager=None):
+        hits, exact = self.lexical.search(query, self.k)
+        if exact or self.vectorstore is None:
+            return [self.lexical.document(i) for i, _ in hits]
+
+        fused, docs = {}, {}
+        for rank, (i, _) in enumerate(hits):
+            doc = self.lexical.document(i)
+            fused[doc.id] = fused.get(doc.id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs[doc.id] = doc
+        for rank, doc in enumerate(self.vectorstore.similarity_search(query, k=self.k)):
+            fused[doc.id] = fused.get(doc.id, 0.0) + 1.0 / (RRF_K + rank + 1)
+            docs.setdefault(doc.id, doc)
+        ranked = sorted(fused, key=lambda doc_id: -fused[doc_id])[:self.k]
+        return [docs[doc_id] for doc_id in ranked]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="构建/查询字符 n-gram BM25 词法索引")
+    parser.add_argument("--input", default=INPUT_FILE)
+    parser.add_argument("--index", default=LEXICAL_INDEX_PATH)
+    parser.add_argument("--rebuild", action="store_true")
+    parser.add_argument("--query", default=None, help="构建后执行一次查询")
+    parser.add_argument("-k", type=int, default=5)
+    args = parser.parse_args()
+
+    lexical = load_or_build(args.input, args.index, args.rebuild)
+    if args.query:
+        start = time.perf_counter()
+        hits, _ = lexical.search(args.query, args.k)
+        elapsed = (time.perf_counter() - start) * 1000
+        for i, score in hits:
+            print(f"[{score if score == 'exact' else f'{score:.2f}'}] {lexical.document(i).page_content[:60]}")
+        print(f"查询用时 {elapsed:.2f} ms")
@@ -0,0 +1,205 @@
+import json
+import os
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+BATCH_OUTPUT = "rag_answers.jsonl"
+BATCH_CONCURRENCY = 4
+SERVE_HOST = "127.0.0.1"
+SERVE_PORT = 8765
+
+
+def add_query_mode_arguments(parser):
+    parser.add_argument("--questions", default=None, help="batch 模式的问题文件：每行一问，或 JSONL（question/id 字段）")
+    parser.add_argument("--output", default=BATCH_OUTPUT, help="batch 模式的 JSONL 输出，续跑时跳过已回答的问题")
+    parser.add_argument("--concurrency", type=int, default=BATCH_CONCURRENCY, help="batch 模式同时处理的问题数")
+    parser.add_argument("--host", default=SERVE_HOST)
+    parser.add_argument("--port", type=int, default=SERVE_PORT)
+
+
+def load_questions(path):
+    """返回 [(id, 问题)]；纯文本文件以问题本身作 id。"""
+    questions = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            if line.startswith("{"):
+                item = json.loads(line)
+                questions.append((str(item.get("id", item["question"])), item["question"]))
+            else:
+                questions.append((line, line))
+    return list(dict.fromkeys(questions))
+
+
+def load_answered(path):
+    """读取已有输出中成功回答的 id；崩溃时写了一半的末行会被截掉。"""
+    answered = set()
+    if not os.path.exists(path):
+        return answered
+    good_offset = 0
+    with open(path, "rb") as f:
+        for raw in f:
+            if not raw.endswith(b"\n"):
+                break
+            try:
+                item = json.loads(raw)
+            except ValueError:
+                break
+            if "error" not in item:
+                answered.add(item["id"])
+            good_offset += len(raw)
+    if good_offset != os.path.getsize(path):
+        with open(path, "r+b") as f:
+            f.truncate(good_offset)
+    return answered
+
+
+class LatencyStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.retrieval = []
+        self.generation = []
+        self.errors = 0
+
+    def add(self, result):
+        with self.lock:
+            if "error" in result:
+                self.errors += 1
+            else:
+                self.retrieval.append(result["retrieval_ms"])
+                self.generation.append(result["generation_ms"])
+
+    @staticmethod
+    def _percentiles(values):
+        if not values:
+            return {}
+        ordered = sorted(values)
+        pick = lambda q: ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+        return {"p50": pick(0.5), "p95": pick(0.95), "max": ordered[-1]}
+
+    def summary(self):
+        with self.lock:
+            return {"answered": len(self.retrieval), "errors": self.errors,
+                    "retrieval_ms": self._percentiles(self.retrieval),
+                    "generation_ms": self._percentiles(self.generation)}
+
+
+def answer_safely(engine, qid, question):
+    try:
+        result = engine.answer(question)
+    except Exception as e:
+        result = {"question": question, "error": str(e)}
+    result["id"] = qid
+    return result
+
+
+def run_batch(engine, questions_path, output_path=BATCH_OUTPUT, concurrency=BATCH_CONCURRENCY):
+    """
+    从文件读入问题，以有限并发执行检索+生成，答案按完成顺序逐行追加到 JSONL。
+    已成功回答的问题在续跑时跳过，失败的问题下次重试。
+    """
+    if not questions_path:
+        print("错误：batch 模式需要 --questions。")
+        return
+    questions = load_questions(questions_path)
+    answered = load_answered(output_path)
+    pending = deque((qid, q) for qid, q in questions if qid not in answered)
+    print(f"共 {len(questions)} 个问题，已回答 {len(questions) - len(pending)}，待处理 {len(pending)}。")
+
+    stats = LatencyStats()
+    start = time.perf_counter()
+    with open(output_path, "a", encoding="utf-8") as out, ThreadPoolExecutor(max_workers=concurrency) as pool:
+        in_flight = set()
+        while pending or in_flight:
+            # 同时在途的问题数不超过并发数
+            while pending and len(in_flight) < concurrency:
+                qid, question = pending.popleft()
+                in_flight.add(pool.submit(answer_safely, engine, qid, question))
+            done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                stats.add(result)
+                out.write(json.dumps(result, ensure_ascii=False) + "\n")
+                out.flush()
+                if "error" in result:
+                    print(f"[失败] {result['question']}: {result['error']}")
+                else:
+                    print(f"[完成] {result['question']}  检索 {result['retrieval_ms']} ms / 生成 {result['generation_ms']} ms")
+
+    summary = stats.summary()
+    elapsed = time.perf_counter() - start
+    print(f"\n批量完成：成功 {summary['answered']}，失败 {summary['errors']}，用时 {elapsed:.1f} 秒。")
+    for key in ["retrieval_ms", "generation_ms"]:
+        if summary[key]:
+            print(f"{key}: p50={summary[key]['p50']} p95={summary[key]['p95']} max={summary[key]['max']}")
+    return summary
+
+
+def make_handler(engine, stats):
+    class RagHandler(BaseHTTPRequestHandler):
+        def _send_json(self, status, payload):
+            body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json; charset=utf-8")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _answer(self, question):
+            if not question or not question.strip():
+                self._send_json(400, {"error": "缺少 question"})
+                return
+            result = answer_safely(engine, question, question.strip())
+            stats.add(result)
+            self._send_json(500 if "error" in result else 200, result)
+
+        def do_GET(self):
+            url = urlparse(self.path)
+            if url.path == "/health":
+                self._send_json(200, {"status": "ok"})
+            elif url.path == "/stats":
+                self._send_json(200, stats.summary())
+            elif url.path == "/query":
+                self._answer(parse_qs(url.query).get("q", [""])[0])
+            else:
+                self._send_json(404, {"error": "not found"})
+
+        def do_POST(self):
+            if urlparse(self.path).path != "/query":
+                self._send_json(404, {"error": "not found"})
+                return
+            try:
+                length = int(self.headers.get("Content-Length", 0))
+                body = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError:
+                self._send_json(400, {"error": "请求体不是合法 JSON"})
+                return
+            if not isinstance(body, dict) or not isinstance(body.get("question", ""), str):
+                self._send_json(400, {"error": "请求体应为 {\"question\": \"...\"}"})
+                return
+            self._answer(body.get("question", ""))
+
+        def log_message(self, fmt, *args):
+            print(f"[{self.address_string()}] {fmt % args}")
+
+    return RagHandler
+
+
+def serve(engine, host=SERVE_HOST, port=SERVE_PORT):
+    """常驻本地 HTTP 服务：索引只加载一次，POST /query {"question": ...} 或 GET /query?q=...。"""
+    stats = LatencyStats()
+    server = ThreadingHTTPServer((host, port), make_handler(engine, stats))
+    print(f"RAG 服务已启动：http://{host}:{port}/query（/stats 查看延迟统计，Ctrl+C 退出）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        print("服务已停止。")
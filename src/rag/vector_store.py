@@ -0,0 +1,211 @@
+import json
+import mmap
+import os
+import shutil
+
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.vectorstores import VectorStore
+
+VECTORS_FILE = "vectors.f16"
+IDS_FILE = "ids.json"
+DOCS_FILE = "docs.jsonl"
+OFFSETS_FILE = "offsets.npy"
+META_FILE = "store.json"
+SEARCH_BLOCK = 65536
+
+
+def _normalize(matrix):
+    matrix = np.asarray(matrix, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=-1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return matrix / norms
+
+
+class DocsFile:
+    """
+    只读映射的 JSON Lines 文档文件，按字节偏移取一行。
+    切片不依赖共享的文件位置，多线程同时取文档互不干扰。
+    """
+
+    def __init__(self, path):
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if os.fstat(f.fileno()).st_size else b""
+
+    def read(self, offset):
+        offset = int(offset)
+        end = self._map.find(b"\n", offset)
+        return json.loads(self._map[offset:end if end >= 0 else len(self._map)])
+
+    def close(self):
+        if isinstance(self._map, mmap.mmap):
+            self._map.close()
+
+
+class MmapVectorStore(VectorStore):
+    """
+    内存映射的 float16 向量库：
+      vectors.f16  归一化后的 (n, dim) float16 矩阵，只读映射，多进程共享页缓存；
+      ids.json     文档 ID 边车文件；
+      docs.jsonl + offsets.npy  文档正文与元数据，按偏移按需读取。
+    打开索引不读入整库，查询按块计算内积，只解码命中的文档。
+    接口与 LangChain FAISS 一致（load_local/from_texts/add_texts/delete/save_local），
+    可直接替换使用。
+    """
+
+    def __init__(self, embedding, dim, path=None):
+        self.embedding_function = embedding
+        self.dim = dim
+        self.path = path
+        self.vectors = np.zeros((0, dim), dtype=np.float16)
+        self._ids = []
+        self._docs = []
+        self._offsets = None
+        self._docs_fh = None
+
+    @property
+    def embeddings(self):
+        return self.embedding_function
+
+    @property
+    def ids(self):
+        if self._ids is None:
+            with open(os.path.join(self.path, IDS_FILE), "r", encoding="utf-8") as f:
+                self._ids = json.load(f)
+        return self._ids
+
+    @property
+    def index_to_docstore_id(self):
+        return self.ids
+
+    def __len__(self):
+        return len(self.vectors)
+
+    @classmethod
+    def load_local(cls, folder_path, embeddings, **kwargs):
+        with open(os.path.join(folder_path, META_FILE), "r", encoding="utf-8") as f:
+            meta = json.load(f)
+        store = cls(embeddings, meta["dim"], folder_path)
+        if meta["count"]:
+            store.vectors = np.memmap(os.path.join(folder_path, VECTORS_FILE), dtype=np.float16,
+                                      mode="r", shape=(meta["count"], meta["dim"]))
+            store._offsets = np.load(os.path.join(folder_path, OFFSETS_FILE), mmap_mode="r")
+            store._ids = None
+            store._docs = None
+            store._docs_fh = DocsFile(os.path.join(folder_path, DOCS_FILE))
+        return store
+
+    def _read_doc(self, i):
+        if self._docs is not None:
+            return self._docs[i]
+        item = self._docs_fh.read(self._offsets[i])
+        return Document(id=self.ids[i], page_content=item["page_content"], metadata=item["metadata"])
+
+    def _materialize(self):
+        """增删前把映射的数据读入内存；只在建索引的进程中发生。"""
+        if self._docs is None:
+            self._ids = self.ids
+            self._docs = [self._read_doc(i) for i in range(len(self.vectors))]
+            self.vectors = np.array(self.vectors)
+            self._offsets = None
+            if self._docs_fh is not None:
+                self._docs_fh.close()
+                self._docs_fh = None
+
+    def add_embeddings(self, texts, embeddings, metadatas=None, ids=None):
+        self._materialize()
+        texts = list(texts)
+        metadatas = metadatas or [{} for _ in texts]
+        ids = list(ids) if ids is not None else [str(len(self.ids) + i) for i in range(len(texts))]
+        block = _normalize(embeddings).astype(np.float16).reshape(-1, self.dim)
+        self.vectors = np.concatenate([self.vectors, block])
+        self._ids.extend(ids)
+        self._docs.extend(Document(id=i, page_content=t, metadata=m) for i, t, m in zip(ids, texts, metadatas))
+        return ids
+
+    def add_texts(self, texts, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        return self.add_embeddings(texts, self.embedding_function.embed_documents(texts), metadatas, ids)
+
+    def delete(self, ids=None, **kwargs):
+        if not ids:
+            return False
+        self._materialize()
+        drop = set(ids)
+        keep = [i for i, doc_id in enumerate(self._ids) if doc_id not in drop]
+        self.vectors = self.vectors[keep]
+        self._ids = [self._ids[i] for i in keep]
+        self._docs = [self._docs[i] for i in keep]
+        return True
+
+    @classmethod
+    def from_texts(cls, texts, embedding, metadatas=None, ids=None, **kwargs):
+        texts = list(texts)
+        vectors = np.asarray(embedding.embed_documents(texts), dtype=np.float32)
+        store = cls(embedding, vectors.shape[1])
+        store.add_embeddings(texts, vectors, metadatas, ids)
+        return store
+
+    def save_local(self, folder_path):
+        """写入临时目录后整体替换，正在读旧索引的进程不受影响。"""
+        self._materialize()
+        tmp_path = folder_path.rstrip("/\\") + ".tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        os.makedirs(tmp_path)
+        np.ascontiguousarray(self.vectors, dtype=np.float16).tofile(os.path.join(tmp_path, VECTORS_FILE))
+        offsets = np.zeros(len(self._docs), dtype=np.int64)
+        with open(os.path.join(tmp_path, DOCS_FILE), "wb") as f:
+            for i, doc in enumerate(self._docs):
+                offsets[i] = f.tell()
+                f.write(json.dumps({"page_content": doc.page_content, "metadata": doc.metadata},
+                                   ensure_ascii=False).encode("utf-8") + b"\n")
+        np.save(os.path.join(tmp_path, OFFSETS_FILE), offsets)
+        with open(os.path.join(tmp_path, IDS_FILE), "w", encoding="utf-8") as f:
+            json.dump(self._ids, f)
+        with open(os.path.join(tmp_path, META_FILE), "w", encoding="utf-8") as f:
+            json.dump({"dim": self.dim, "count": len(self._ids), "dtype": "float16"}, f)
+        if os.path.exists(folder_path):
+            old_path = folder_path.rstrip("/\\") + ".old"
+            shutil.rmtree(old_path, ignore_errors=True)
+            os.replace(folder_path, old_path)
+            os.replace(tmp_path, folder_path)
+            shutil.rmtree(old_path, ignore_errors=True)
+        else:
+            os.replace(tmp_path, folder_path)
+        self.path = folder_path
+
+    def similarity_search_by_vector_with_score(self, embedding, k=4):
+        n = len(self.vectors)
+        if n == 0:
+            return []
+        query = _normalize(embedding)
+        scores = np.empty(n, dtype=np.float32)
+        for start in range(0, n, SEARCH_BLOCK):
+            block = np.asarray(self.vectors[start:start + SEARCH_BLOCK], dtype=np.float32)
+            scores[start:start + len(block)] = block @ query
+        k = min(k, n)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._read_doc(int(i)), float(scores[i])) for i in top]
+
+    def similarity_search_with_score(self, query, k=4, **kwargs):
+        return self.similarity_search_by_vector_with_score(self.embedding_function.embed_query(query), k)
+
+    def similarity_search_by_vector(self, embedding, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_by_vector_with_score(embedding, k)]
+
+    def similarity_search(self, query, k=4, **kwargs):
+        return [doc for doc, _ in self.similarity_search_with_score(query, k)]
+
+    def _select_relevance_score_fn(self):
+        # 归一化向量的内积即余弦相似度
+        return lambda score: score
+
+
+def store_class(name):
+    if name == "mmap":
+        return MmapVectorStore
+    if name == "faiss":
+        from langchain_community.vectorstores import FAISS
+        return FAISS
+    raise ValueError(f"未知的向量库类型：{name}")
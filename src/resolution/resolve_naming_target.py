@@ -1,50 +1,79 @@
 import pandas as pd
 import re
 import os
+import sys
+import argparse
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+from common.metrics import METRICS, stage
+from common.record_ids import RECORD_COLUMNS, ensure_ids
+from common.table_io import TableWriter, iter_table, read_table, table_exists, write_table
 
 INPUT_CSV = "placename_records.csv"
 OUTPUT_CSV = "placename_records_resolved.csv"
 PLACE_SUFFIXES = ["縣", "州", "郡", "府", "道", "山", "水", "河", "川", "原", "谷", "城", "關", "津", "坡", "陵", "宮", "溪", "岩", "潭"]
 STOP_START_WORDS = ["在", "及", "与", "之", "其", "此", "旧", "从", "至", "界", "有", "谓"]
 
+CANDIDATE_PATTERN = re.compile(rf"([一-龥]{{1,2}}(?:{'|'.join(PLACE_SUFFIXES)}))")
+PLACE_SUFFIX_SET = frozenset(PLACE_SUFFIXES)
+STOP_START_SET = frozenset(STOP_START_WORDS)
+
 def is_valid_name(name):
-    if not (2 <= len(name) <= 3):
-        return False
-    if any(name.startswith(w) for w in STOP_START_WORDS):
-        return False
-    if not any(name.endswith(s) for s in PLACE_SUFFIXES):
-        return False
-    return True
+    # 后缀与黑名单均为单字，集合查找与逐个 startswith/endswith 等价
+    return 2 <= len(name) <= 3 and name[0] not in STOP_START_SET and name[-1] in PLACE_SUFFIX_SET
 
-def resolve_target(row):
-    text = str(row["text"])
-    original = str(row["placename"])
-    
-    pattern = re.compile(rf"([一-龥]{{1,2}}(?:{'|'.join(PLACE_SUFFIXES)}))")
-    candidates = pattern.findall(text)
+def choose_target(original, candidates):
     valid_candidates = [c for c in candidates if is_valid_name(c)]
 
     if valid_candidates:
         if original not in valid_candidates or not is_valid_name(original):
             return valid_candidates[0]
-            
+
     return original if is_valid_name(original) else "未知"
 
-def main():
-    if not os.path.exists(INPUT_CSV):
+def resolve_target(row):
+    text = str(row["text"])
+    original = str(row["placename"])
+    return choose_target(original, CANDIDATE_PATTERN.findall(text))
+
+def resolve_frame(df):
+    """整列提取候选地名后逐条择定，返回过滤掉“未知”后的 record_id/placename/text/source 四列。"""
+    df = ensure_ids(df)
+    candidates = df["text"].astype(str).str.findall(CANDIDATE_PATTERN)
+    df = df.assign(placename=[choose_target(o, c) for o, c in zip(df["placename"].astype(str), candidates)])
+    df = df[df['placename'] != "未知"]
+    return df[RECORD_COLUMNS]
+
+def main(chunksize=None):
+    if not table_exists(INPUT_CSV):
         print(f"错误：找不到 {INPUT_CSV}")
         return
-        
-    df = pd.read_csv(INPUT_CSV).fillna("")
-    
-    df["placename"] = df.apply(resolve_target, axis=1)
-    
-    df = df[df['placename'] != "未知"]
-    
 
-    final_df = df[["placename", "text", "source"]]
-    final_df.to_csv(OUTPUT_CSV, index=False, encoding='utf-8-sig')
+    start = time.perf_counter()
+    records_in = records_out = 0
+    if chunksize:
+        # 分块读写，内存占用与输入规模无关
+        writer = TableWriter(OUTPUT_CSV)
+        # 先写表头，输入为空时也产出只有表头的结果表，与整表模式一致
+        writer.write(pd.DataFrame(columns=RECORD_COLUMNS))
+        for chunk in iter_table(INPUT_CSV, chunksize, columns=RECORD_COLUMNS):
+            resolved = resolve_frame(chunk.fillna(""))
+            writer.write(resolved)
+            records_in += len(chunk)
+            records_out += len(resolved)
+        writer.close()
+    else:
+        df = read_table(INPUT_CSV, columns=RECORD_COLUMNS).fillna("")
+        final_df = resolve_frame(df)
+        write_table(final_df, OUTPUT_CSV)
+        records_in, records_out = len(df), len(final_df)
+    METRICS.throughput("resolve", time.perf_counter() - start, records=records_in, resolved=records_out)
     print("完成：resolve_naming_target 已同步最新的过滤逻辑，剔除了方位词干扰。")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="跨条目叙述下的命名对象回指消解")
+    parser.add_argument("--chunksize", type=int, default=None, help="分块处理的行数，缺省为整表处理")
+    args = parser.parse_args()
+    with stage("resolve"):
+        main(args.chunksize)
@@ -1,12 +1,30 @@
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
+from concurrent.futures import ProcessPoolExecutor
+import argparse
+import hashlib
+import json
 import os
+import sys
+import time
 
-input_path = "/Users/johnjennings/Desktop/地名自动化/"   
-output_path = "/Users/johnjennings/Desktop/地名自动化/database"      
-os.makedirs(output_path, exist_ok=True)
+try:
+    import lxml  # noqa: F401
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src"))
+from common.metrics import METRICS, stage
+
+INPUT_PATH = "/Users/johnjennings/Desktop/地名自动化/"
+OUTPUT_PATH = "/Users/johnjennings/Desktop/地名自动化/database"
+MANIFEST_NAME = ".transport_manifest.json"
+
+CTEXT_ONLY = SoupStrainer("td", class_="ctext")
 
 def extract_ctext_text(html_content):
-    soup = BeautifulSoup(html_content, "html.parser")
+    # 只构建 td.ctext 子树，其余标签在解析阶段即被丢弃
+    soup = BeautifulSoup(html_content, HTML_PARSER, parse_only=CTEXT_ONLY)
     nodes = soup.find_all("td", class_="ctext")
     texts = []
     for n in nodes:
@@ -14,15 +32,87 @@ def extract_ctext_text(html_content):
         texts.append(t)
     return "\n\n".join(texts)
 
-for file in os.listdir(input_path):
-    if file.endswith(".html"):
-        with open(os.path.join(input_path, file), "r", encoding="utf-8") as f:
-            html = f.read()
+def file_digest(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+def convert_file(src, dst):
+    with open(src, "r", encoding="utf-8") as f:
+        html = f.read()
+
+    clean_text = extract_ctext_text(html)
+
+    with open(dst, "w", encoding="utf-8") as f:
+        f.write(clean_text)
+    return os.path.getsize(src)
+
+def load_manifest(path):
+    if not os.path.exists(path):
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+def save_manifest(path, manifest):
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=0, sort_keys=True)
+    os.replace(tmp_path, path)
+
+def plan_conversions(input_path, output_path, manifest, force=False):
+    """
+    返回需要重新转换的 (文件名, 源路径, 目标路径, 内容哈希)。
+    输出比输入新则直接跳过；否则比较内容哈希，未变化时只刷新输出时间戳。
+    """
+    tasks = []
+    for file in sorted(os.listdir(input_path)):
+        if not file.endswith(".html"):
+            continue
+        src = os.path.join(input_path, file)
+        dst = os.path.join(output_path, file.replace(".html", ".txt"))
+        if not force and os.path.exists(dst) and os.path.getmtime(dst) >= os.path.getmtime(src):
+            continue
+        digest = file_digest(src)
+        if not force and os.path.exists(dst) and manifest.get(file) == digest:
+            os.utime(dst)
+            continue
+        tasks.append((file, src, dst, digest))
+    return tasks
+
+def main(input_path=INPUT_PATH, output_path=OUTPUT_PATH, workers=1, force=False):
+    os.makedirs(output_path, exist_ok=True)
+    manifest_path = os.path.join(output_path, MANIFEST_NAME)
+    manifest = load_manifest(manifest_path)
+
+    tasks = plan_conversions(input_path, output_path, manifest, force)
+    start = time.perf_counter()
+    if workers > 1 and len(tasks) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            sizes = list(pool.map(convert_file, [t[1] for t in tasks], [t[2] for t in tasks],
+                                  chunksize=max(1, len(tasks) // (workers * 4))))
+    else:
+        sizes = [convert_file(src, dst) for _, src, dst, _ in tasks]
+    elapsed = time.perf_counter() - start
 
-        clean_text = extract_ctext_text(html)
+    for file, _, _, digest in tasks:
+        manifest[file] = digest
+    save_manifest(manifest_path, manifest)
 
-        with open(os.path.join(output_path, file.replace(".html", ".txt")), 
-                  "w", encoding="utf-8") as f:
-            f.write(clean_text)
+    total_mb = sum(sizes) / (1024 * 1024)
+    rate = (len(tasks) / elapsed, total_mb / elapsed) if elapsed > 0 else (0.0, 0.0)
+    METRICS.throughput("transport", elapsed, files=len(tasks), bytes=sum(sizes))
+    print(f"转换 {len(tasks)} 个文件（{total_mb:.1f} MB），用时 {elapsed:.2f} 秒，"
+          f"{rate[0]:.1f} 文件/秒，{rate[1]:.2f} MB/秒。")
+    print("全部转换完成！")
 
-print("全部转换完成！")
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="把 ctext HTML 页面清洗为 UTF-8 纯文本（增量、并行）")
+    parser.add_argument("--input", default=INPUT_PATH, help="HTML 文件所在目录")
+    parser.add_argument("--output", default=OUTPUT_PATH, help="TXT 输出目录")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="并行转换的进程数")
+    parser.add_argument("--force", action="store_true", help="忽略时间戳与哈希，全部重新转换")
+    args = parser.parse_args()
+    with stage("transport"):
+        main(args.input, args.output, args.workers, args.force)